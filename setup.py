@@ -11,6 +11,10 @@ setup(
         "google-auth-oauthlib>=0.4.0",
         "google-auth-httplib2>=0.1.0",
     ],
+    extras_require={
+        # インストールされていればJSONの解析・生成に使う（なければ標準のjsonを使う）
+        "fast": ["orjson>=3.9"],
+    },
     entry_points={
         "console_scripts": [
             "ytlive=app:main",
@@ -1,14 +1,18 @@
 """
 統合配信サービスのモジュール
 """
-import time
+import logging
+import sys
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, List, Dict, Any, Tuple
 
 from src.domain.entities.stream_settings import StreamConfigModel
 from src.domain.interfaces.obs_interface import OBSConnectionInterface, SceneManagerInterface, StreamControlInterface
 from src.domain.interfaces.youtube_interface import YouTubeLiveInterface
 
+logger = logging.getLogger(__name__)
+
 class StreamService:
     """統合配信サービスクラス"""
     
@@ -17,7 +21,8 @@ class StreamService:
         obs_connection: OBSConnectionInterface,
         scene_manager: SceneManagerInterface,
         stream_controller: StreamControlInterface,
-        youtube_controller: Optional[YouTubeLiveInterface] = None
+        youtube_controller: Optional[YouTubeLiveInterface] = None,
+        interactive: Optional[bool] = None
     ):
         """
         配信サービスを初期化する
@@ -27,22 +32,40 @@ class StreamService:
             scene_manager: シーン管理インターフェース
             stream_controller: 配信制御インターフェース
             youtube_controller: YouTubeライブ配信コントローラー（オプショナル）
+            interactive: 手動操作の入力待ちを行うかどうか（省略時は標準入力が端末かどうかで判定）
         """
         self.obs_connection = obs_connection
         self.scene_manager = scene_manager
         self.stream_controller = stream_controller
         self.youtube_controller = youtube_controller
+        self.interactive = sys.stdin.isatty() if interactive is None else interactive
         
         # 状態管理
         self.broadcast_id = None
         self.stream_key = None
         self.is_obs_configured = False
         
-        # 日付テキスト更新用のタイマー
-        self.date_update_timer = None
-        self.date_update_running = False
+        # 日付テキスト更新用のスレッド
+        self._date_thread = None
+        self._date_stop = threading.Event()
         self.date_update_interval = 10  # 10秒ごとに更新
     
+    def _ensure_connected(self) -> Any:
+        """
+        OBSクライアントを取得する（切断されている場合のみ再接続）
+        
+        Returns:
+            接続済みのOBS WebSocketクライアント
+        """
+        client = self.obs_connection.get_client()
+        # 往復通信を増やさないよう、下層のWebSocketの状態だけを確認する
+        ws = getattr(getattr(client, 'base_client', None), 'ws', None)
+        if ws is not None and not getattr(ws, 'connected', True):
+            logger.warning("OBS接続が切断されています。再接続します")
+            # シーン管理と配信制御も同じ接続からクライアントを取得するため、新しい接続が共有される
+            client = self.obs_connection.reconnect()
+        return client
+    
     def setup_youtube_live(self, title: str, description: str = "", privacy_status: str = "public") -> bool:
         """
         YouTubeライブ配信の設定を行う
@@ -56,7 +79,7 @@ class StreamService:
             bool: 成功した場合はTrue
         """
         if not self.youtube_controller:
-            print("YouTubeコントローラーが設定されていません")
+            logger.error("YouTubeコントローラーが設定されていません")
             return False
             
         try:
@@ -65,7 +88,7 @@ class StreamService:
                 title, description, privacy_status)
             return True
         except Exception as e:
-            print(f"YouTube配信設定エラー: {str(e)}")
+            logger.error("YouTube配信設定エラー: %s", e)
             return False
     
     def configure_obs_for_youtube(self, rtmp_url: str, stream_key: str) -> bool:
@@ -80,38 +103,16 @@ class StreamService:
             bool: 成功した場合はTrue
         """
         try:
-            # OBS WebSocket v5 API を使用して配信設定を行う
-            client = self.obs_connection.get_client()
-            
-            # 配信状態を確認
-            is_streaming = self.stream_controller.is_streaming()
-            if is_streaming:
-                print("警告: OBSは既に配信中です。配信中は設定を変更できません。")
-                self.is_obs_configured = True
-                return True
-            
-            # 配信設定の作成
-            settings = {
-                "server": rtmp_url,
-                "key": stream_key
-            }
-            
-            # 詳細なレスポンスの確認
-            print("OBSのストリーミング設定を更新中...")
-            response = client.send(
-                "SetStreamServiceSettings",
-                {
-                    "streamServiceType": "rtmp_custom",
-                    "streamServiceSettings": settings
-                }
-            )
-            
-            print(f"設定更新レスポンス: {response}")
-            self.is_obs_configured = True
-            return True
-                
+            # 配信状態は一度だけ確認し、状態ごとの処理に振り分ける
+            if self.stream_controller.is_streaming():
+                return self._configure_obs_while_streaming(rtmp_url, stream_key)
+            return self._configure_obs_not_streaming(rtmp_url, stream_key)
         except Exception as e:
-            print(f"OBS設定エラー: {str(e)}")
+            logger.error("OBS設定エラー: %s", e)
+            if not self.interactive:
+                logger.warning("非対話モードのため、OBSの手動設定待ちをスキップします")
+                return False
+            
             print("\n以下の設定を手動で行ってください:")
             print("1. OBSの「設定」→「配信」を開く")
             print("2. サービスを「カスタム」に設定")
@@ -121,6 +122,89 @@ class StreamService:
             input("\nOBSの設定が完了したらEnterキーを押してください...")
             return False
     
+    def _configure_obs_while_streaming(self, rtmp_url: str, stream_key: str) -> bool:
+        """
+        配信中のOBSに対する設定処理（配信中は設定を変更できないため確認のみ行う）
+        
+        Args:
+            rtmp_url: RTMP URL
+            stream_key: ストリームキー
+            
+        Returns:
+            bool: 常にTrue
+        """
+        logger.warning("OBSは既に配信中です。配信中は設定を変更できません。")
+        if not self._verify_applied(rtmp_url, stream_key):
+            logger.warning("配信中のOBSの設定は指定されたYouTubeストリームと異なります")
+        self.is_obs_configured = True
+        return True
+    
+    def _configure_obs_not_streaming(self, rtmp_url: str, stream_key: str) -> bool:
+        """
+        配信していないOBSにYouTube用の配信設定を適用する
+        
+        Args:
+            rtmp_url: RTMP URL
+            stream_key: ストリームキー
+            
+        Returns:
+            bool: 成功した場合はTrue
+        """
+        # 配信設定の作成
+        settings = {
+            "server": rtmp_url,
+            "key": stream_key
+        }
+        
+        # obs-websocket v5は設定の適用後に応答を返し、失敗時はobsws-pythonが例外を送出する
+        # そのため応答を受け取った時点で適用済みとみなし、待機や再取得による確認は行わない
+        logger.info("OBSのストリーミング設定を更新中...")
+        # 送信はOBSClientのロックで他のコンポーネントの送信と直列化される
+        self._ensure_connected()
+        self.obs_connection.send(
+            "SetStreamServiceSettings",
+            {
+                "streamServiceType": "rtmp_custom",
+                "streamServiceSettings": settings
+            }
+        )
+        
+        logger.info("OBSのストリーミング設定を更新しました")
+        self.is_obs_configured = True
+        return True
+    
+    def _verify_applied(self, rtmp_url: str, stream_key: str) -> bool:
+        """
+        OBSに指定のサーバーとストリームキーが設定済みかどうかを確認する
+        
+        配信中は設定を変更できないため、配信中の設定が一致しているかの確認にのみ使う
+        
+        Args:
+            rtmp_url: RTMP URL
+            stream_key: ストリームキー
+            
+        Returns:
+            bool: 設定済みの場合はTrue
+        """
+        try:
+            self._ensure_connected()
+            response = self.obs_connection.send("GetStreamServiceSettings")
+        except Exception as e:
+            logger.error("配信サービス設定の取得エラー: %s", e)
+            return False
+        
+        # obsws-pythonのデータクラスと辞書形式のどちらのレスポンスにも対応する
+        if isinstance(response, dict):
+            settings = response.get('streamServiceSettings')
+        else:
+            settings = getattr(response, 'stream_service_settings', None)
+        
+        if isinstance(settings, dict):
+            server, key = settings.get('server', ''), settings.get('key', '')
+        else:
+            server, key = getattr(settings, 'server', ''), getattr(settings, 'key', '')
+        return server == rtmp_url and key == stream_key
+    
     def start_integrated_stream(
         self,
         title: str = "自動配信テスト",
@@ -137,7 +221,8 @@ class StreamService:
             description: 配信の説明
             privacy_status: プライバシー設定（public/private/unlisted）
             scene_name: 切り替える場面名。Noneの場合は切り替えなし
-            start_delay: OBSストリーミング開始から配信開始までの遅延（秒）
+            start_delay: OBSストリーミング開始の待機時間に加算する猶予（秒）。
+                         開始イベントを受信した時点で待機を終えるため、上限として扱われる
             
         Returns:
             bool: 成功したらTrue
@@ -148,7 +233,7 @@ class StreamService:
             stream_key = None
             
             if self.youtube_controller:
-                print("YouTubeライブ配信を準備中...")
+                logger.info("YouTubeライブ配信を準備中...")
                 # ブロードキャスト作成
                 broadcast = self.youtube_controller.create_broadcast(
                     title=title, 
@@ -157,79 +242,117 @@ class StreamService:
                     start_time=None  # 明示的にNoneを渡す (コントローラーが現在時刻+5分を自動設定)
                 )
                 if not broadcast:
-                    print("ブロードキャスト作成に失敗しました")
+                    logger.error("ブロードキャスト作成に失敗しました")
                     return False
                 
                 self.broadcast_id = broadcast['id']
-                print(f"ブロードキャストを作成しました: {self.broadcast_id}")
+                logger.info("ブロードキャストを作成しました: %s", self.broadcast_id)
                 
                 # ストリーム作成
                 stream_id, rtmp_url, stream_key = self.youtube_controller.create_stream()
                 if not stream_id:
-                    print("ストリーム作成に失敗しました")
-                    return False
-                
-                # ブロードキャストとストリームをバインド
-                if not self.youtube_controller.bind_broadcast_to_stream(self.broadcast_id, stream_id):
-                    print("ブロードキャストとストリームのバインドに失敗しました")
+                    logger.error("ストリーム作成に失敗しました")
                     return False
                 
                 # RTMPとストリームキーを取得
                 self.stream_key = stream_key
                 
-                print(f"RTMP URL: {rtmp_url}")
-                print(f"ストリームキー: {self.stream_key[:5]}...")  # セキュリティのため全部は表示しない
+                logger.info("RTMP URL: %s", rtmp_url)
+                logger.info("ストリームキー: %s...", self.stream_key[:5])  # セキュリティのため全部は表示しない
+                
+                # OBSへのYouTube設定とブロードキャストのバインドは互いに独立しているため並行して行う
+                with ThreadPoolExecutor(max_workers=1) as executor:
+                    obs_future = executor.submit(self.configure_obs_for_youtube, rtmp_url, self.stream_key)
+                    bound = self.youtube_controller.bind_broadcast_to_stream(self.broadcast_id, stream_id)
+                    obs_configured = obs_future.result()
                 
-                # OBSにYouTube設定をセットアップ
-                if not self.configure_obs_for_youtube(rtmp_url, self.stream_key):
-                    print("OBSのYouTube設定に失敗しました")
+                if not bound:
+                    logger.error("ブロードキャストとストリームのバインドに失敗しました")
+                    return False
+                
+                if not obs_configured:
+                    logger.error("OBSのYouTube設定に失敗しました")
                     return False
                 
                 self.is_obs_configured = True
             else:
-                print("YouTubeライブ配信をスキップします")
+                logger.info("YouTubeライブ配信をスキップします")
             
-            # OBSのシーン切り替え（指定があれば）
-            if scene_name:
-                if not self.scene_manager.switch_to_scene(scene_name):
-                    print(f"シーン '{scene_name}' への切り替えに失敗しました")
-                    return False
+            # OBSのシーン切り替え（指定があれば）とストリーミング開始
+            if not self._switch_scene_and_start_streaming(scene_name):
+                return False
             
-            # 日付テキスト更新タイマーを開始
+            # 日付テキスト更新タイマーを開始（RequestBatchの送信後に開始する）
             self._start_date_text_updater()
                 
-            # OBSのストリーミング開始
-            if not self.stream_controller.start_streaming():
-                print("OBSのストリーミング開始に失敗しました")
-                return False
-                
             # YouTubeのブロードキャスト開始（コントローラーがある場合のみ）
             if self.youtube_controller and self.broadcast_id:
-                # 少し遅延を入れてOBSのストリーミングが始まるのを待つ
-                print(f"OBSストリーミングを開始しました。{start_delay}秒後にYouTube配信を開始します...")
-                time.sleep(start_delay)
-                
-                # ストリーミングの実際の開始を待機
-                if not self.stream_controller.wait_for_stream_start(timeout=60):
-                    print("警告: ストリーミングの開始を確認できませんでした。続行します。")
+                # StreamStateChangedイベントでストリーミングの実際の開始を待機
+                logger.info("OBSストリーミングを開始しました。開始を確認後にYouTube配信を開始します...")
+                if not self.stream_controller.wait_for_stream_start(timeout=start_delay + 60):
+                    logger.warning("ストリーミングの開始を確認できませんでした。続行します。")
                 
                 # ブロードキャストをライブ状態に遷移
                 if not self.youtube_controller.start_broadcast(self.broadcast_id):
-                    print("ブロードキャストのライブ開始に失敗しました")
+                    logger.error("ブロードキャストのライブ開始に失敗しました")
                     return False
                     
-                print(f"配信が開始されました！ YouTube URL: https://www.youtube.com/watch?v={self.broadcast_id}")
+                logger.info("配信が開始されました！ YouTube URL: https://www.youtube.com/watch?v=%s", self.broadcast_id)
             else:
-                print("OBSのストリーミングを開始しました。")
+                logger.info("OBSのストリーミングを開始しました。")
             
             return True
             
         except Exception as e:
-            print(f"統合配信の開始中にエラーが発生しました: {e}")
-            # トレースバックを出力
-            import traceback
-            traceback.print_exc()
+            logger.exception("統合配信の開始中にエラーが発生しました: %s", e)
+            return False
+    
+    def _switch_scene_and_start_streaming(self, scene_name: Optional[str]) -> bool:
+        """
+        シーン切り替えと配信開始をRequestBatchで1回の往復にまとめて行う
+        
+        バッチで完了しなかった処理は、個別のリクエストで改めて実行する
+        
+        Args:
+            scene_name: 切り替えるシーン名。Noneの場合は切り替えなし
+            
+        Returns:
+            bool: 成功した場合はTrue
+        """
+        requests = []
+        if scene_name:
+            switch_request = self.scene_manager.build_switch_request(scene_name)
+            if switch_request is None:
+                logger.error("シーン '%s' への切り替えに失敗しました", scene_name)
+                return False
+            requests.append(switch_request)
+        requests.append(self.stream_controller.build_start_request())
+        
+        scene_done = not scene_name
+        start_done = False
+        try:
+            # バッチのStartStreamはstart_streamingを経由しないため、先に配信状態をリセットしておく
+            self.stream_controller.prepare_start()
+            results = self.obs_connection.send_batch(requests, halt_on_failure=True)
+            for result in results:
+                succeeded = result.get("requestStatus", {}).get("result", False)
+                if result.get("requestType") == "SetCurrentProgramScene":
+                    scene_done = succeeded
+                elif result.get("requestType") == "StartStream":
+                    start_done = succeeded
+        except Exception as e:
+            logger.warning("RequestBatchの送信に失敗しました。個別に送信します: %s", e)
+        
+        if not scene_done and not self.scene_manager.switch_to_scene(scene_name):
+            logger.error("シーン '%s' への切り替えに失敗しました", scene_name)
             return False
+        if scene_name and scene_done:
+            logger.info("シーンを '%s' に切り替えました", scene_name)
+        
+        if not start_done and not self.stream_controller.start_streaming():
+            logger.error("OBSのストリーミング開始に失敗しました")
+            return False
+        return True
     
     def stop_integrated_stream(self) -> bool:
         """
@@ -245,65 +368,58 @@ class StreamService:
             self._stop_date_text_updater()
             
             # OBSのストリーミングを停止
-            print("OBSのストリーミングを停止中...")
+            logger.info("OBSのストリーミングを停止中...")
             if not self.stream_controller.stop_streaming():
-                print("OBSのストリーミング停止に失敗しました")
+                logger.error("OBSのストリーミング停止に失敗しました")
                 success = False
             
             # YouTubeのブロードキャストを終了（コントローラーがある場合のみ）
             if self.youtube_controller and self.broadcast_id:
-                print("YouTubeブロードキャストを終了中...")
+                logger.info("YouTubeブロードキャストを終了中...")
                 if not self.youtube_controller.end_broadcast(self.broadcast_id):
-                    print("YouTubeブロードキャストの終了に失敗しました")
+                    logger.error("YouTubeブロードキャストの終了に失敗しました")
                     success = False
                 else:
-                    print("YouTubeブロードキャストを正常に終了しました")
+                    logger.info("YouTubeブロードキャストを正常に終了しました")
             
-            # 接続をクリーンアップ
-            self.obs_connection.disconnect()
+            # OBS接続はセッション全体で共有しているため、ここでは切断しない（終了時にmainで切断する）
             
             return success
             
         except Exception as e:
-            print(f"統合配信の停止中にエラーが発生しました: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("統合配信の停止中にエラーが発生しました: %s", e)
             return False
     
     def _start_date_text_updater(self):
         """日付テキストの更新を開始する"""
-        if self.date_update_timer is None:
-            self.date_update_timer = threading.Timer(self.date_update_interval, self._update_date_text)
-            self.date_update_timer.daemon = True
-            self.date_update_timer.start()
-            self.date_update_running = True
+        if self._date_thread is None or not self._date_thread.is_alive():
+            # スレッドごとに停止イベントを作り、停止済みのスレッドが再開されないようにする
+            self._date_stop = threading.Event()
+            self._date_thread = threading.Thread(target=self._date_loop, args=(self._date_stop,), daemon=True)
+            self._date_thread.start()
+
+    def _date_loop(self, stop_event: threading.Event):
+        """
+        停止が要求されるまで一定間隔で日付テキストを更新する
+        
+        Args:
+            stop_event: このスレッドの停止イベント
+        """
+        while not stop_event.wait(self.date_update_interval):
+            try:
+                self._update_date_text()
+            except Exception as e:
+                # エラーがあっても次の更新を試みる
+                logger.error("日付テキスト更新エラー: %s", e)
 
     def _update_date_text(self):
         """日付テキストを更新する"""
-        try:
-            # [yyyy/MM/dd HH:mm:ss]形式で日付を取得
-            current_date = time.strftime("[%Y/%m/%d %H:%M:%S]")
-            print(f"日付テキストを更新: {current_date}")
-            
-            # OBSのテキストソースを更新
-            self.scene_manager.update_text_source("text", current_date)
-            
-            # 次の更新のためにタイマーを再スタート（プログラムが実行中の場合）
-            if self.date_update_running:
-                self.date_update_timer = threading.Timer(self.date_update_interval, self._update_date_text)
-                self.date_update_timer.daemon = True
-                self.date_update_timer.start()
-        except Exception as e:
-            print(f"日付テキスト更新エラー: {e}")
-            # エラーがあっても次の更新を試みる
-            if self.date_update_running:
-                self.date_update_timer = threading.Timer(self.date_update_interval, self._update_date_text)
-                self.date_update_timer.daemon = True
-                self.date_update_timer.start()
+        # 日付の組み立てとキャッシュ、同じテキストの送信省略はシーン管理側で行う
+        self.scene_manager.update_date_text("text")
 
     def _stop_date_text_updater(self):
-        """日付テキストの更新を停止する"""
-        if self.date_update_timer:
-            self.date_update_timer.cancel()
-            self.date_update_timer = None
-            self.date_update_running = False 
\ No newline at end of file
+        """日付テキストの更新を停止する（更新中の場合は完了を待つ）"""
+        self._date_stop.set()
+        if self._date_thread is not None:
+            self._date_thread.join(timeout=self.date_update_interval)
+            self._date_thread = None
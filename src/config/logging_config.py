@@ -0,0 +1,38 @@
+"""
+ログ出力の設定を行うモジュール
+"""
+import atexit
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+_listener: Optional[QueueListener] = None
+
+def setup_logging(level: int = logging.INFO) -> None:
+    """
+    ルートロガーを設定する
+
+    ログレコードはキューに積まれ、専用スレッドのQueueListenerが標準出力へ書き出す。
+    呼び出し側のスレッドが標準出力への書き込みで待たされることはない。
+
+    Args:
+        level: ログレベル
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter("%(message)s"))
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(QueueHandler(log_queue))
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    # 終了時にキューに残ったログを書き出す
+    atexit.register(_listener.stop)
@@ -1,26 +1,67 @@
 """
 設定の読み込みと管理を行うモジュール
 """
-import json
+import copy
+import functools
 import os
 from typing import Dict, Any, Optional
 
-class ConfigManager:
-    """設定を管理するクラス"""
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    import json
+    _loads = json.loads
+
+# プロジェクトルートのconfig.json（src/config/settings.py から2階層上）
+_PROJECT_ROOT_CONFIG = os.path.normpath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'config.json'))
+
+@functools.lru_cache(maxsize=4)
+def _load_cached(path: str, mtime_ns: int) -> Dict[str, Any]:
+    """
+    設定ファイルを解析する（パスと更新時刻ごとに結果をキャッシュ）
     
-    _instance = None
-    _config = None
+    Args:
+        path: 設定ファイルの絶対パス
+        mtime_ns: 設定ファイルの更新時刻（ナノ秒）。変更されるとキャッシュが無効になる
+        
+    Returns:
+        設定の辞書
+    """
+    # orjsonはUTF-8のバイト列を直接解析する
+    with open(path, 'rb') as f:
+        return _loads(f.read())
+
+def load_config(config_file: str) -> Dict[str, Any]:
+    """
+    設定ファイルを読み込む
     
-    def __new__(cls, config_file: str = None):
-        """シングルトンパターンを実装"""
-        if cls._instance is None:
-            cls._instance = super(ConfigManager, cls).__new__(cls)
-            cls._instance._load_config(config_file)
-        return cls._instance
+    ファイルの更新時刻が前回と同じであれば、解析済みの設定を再利用する。
+    キャッシュした辞書を呼び出し側の変更から守るため、コピーを返す
+    
+    Args:
+        config_file: 設定ファイルのパス
+        
+    Returns:
+        設定の辞書
+    """
+    return copy.deepcopy(_load_cached(os.path.abspath(config_file), os.stat(config_file).st_mtime_ns))
+
+class ConfigManager:
+    """設定を管理するクラス"""
     
     def __init__(self, config_file: str = None):
-        """既に__new__で初期化済みなので何もしない"""
-        pass
+        """
+        設定を読み込む
+        
+        解析結果はload_configでキャッシュされるため、インスタンスの生成は軽量
+        
+        Args:
+            config_file: 設定ファイルのパス（省略時はconfig.jsonを検索）
+        """
+        self._config = None
+        self._load_config(config_file)
     
     def _load_config(self, config_file: Optional[str] = None) -> None:
         """設定ファイルを読み込む"""
@@ -31,13 +72,12 @@ class ConfigManager:
                 if os.path.exists('config.json'):
                     config_file = 'config.json'
                 # プロジェクトルートのconfig.jsonを検索
-                elif os.path.exists(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'config.json')):
-                    config_file = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'config.json')
+                elif os.path.exists(_PROJECT_ROOT_CONFIG):
+                    config_file = _PROJECT_ROOT_CONFIG
                 else:
                     raise FileNotFoundError("設定ファイルが見つかりません")
             
-            with open(config_file, 'r', encoding='utf-8') as f:
-                self._config = json.load(f)
+            self._config = load_config(config_file)
                 
             print(f"設定を読み込みました: {config_file}")
         except Exception as e:
@@ -1,10 +1,14 @@
 """
 配信設定を表すエンティティクラス
 """
+import sys
 from typing import List, Optional, Dict, Any
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
-@dataclass
+# slots=TrueはPython 3.10以降でのみ利用可能
+_DATACLASS_OPTIONS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+@dataclass(**_DATACLASS_OPTIONS)
 class OBSConnectionSettings:
     """OBS接続設定"""
     host: str
@@ -12,7 +16,7 @@ class OBSConnectionSettings:
     password: str
     timeout: int = 30
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class StreamSettings:
     """配信設定"""
     title: str
@@ -22,19 +26,15 @@ class StreamSettings:
     start_delay: int = 5
     duration: int = 30
     interval: int = 5
-    scenes: List[str] = None
-    
-    def __post_init__(self):
-        """初期化後の処理"""
-        if self.scenes is None:
-            self.scenes = ["Scene"]
+    scenes: List[str] = field(default_factory=lambda: ["Scene"])
+    auto_proceed_on_invalid_transition: bool = False
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class YouTubeSettings:
     """YouTube設定"""
     client_secrets: str
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class StreamConfigModel:
     """配信設定全体のモデル"""
     obs: OBSConnectionSettings
@@ -48,6 +48,10 @@ class StreamConfigModel:
         stream_dict = config_dict.get('stream', {})
         youtube_dict = config_dict.get('youtube', {})
         
+        scenes = stream_dict.get('scenes')
+        if scenes is None:
+            scenes = ["Scene"]
+        
         obs_settings = OBSConnectionSettings(
             host=obs_dict.get('host', 'localhost'),
             port=obs_dict.get('port', 4455),
@@ -63,7 +67,8 @@ class StreamConfigModel:
             start_delay=stream_dict.get('start_delay', 5),
             duration=stream_dict.get('duration', 30),
             interval=stream_dict.get('interval', 5),
-            scenes=stream_dict.get('scenes', ["Scene"])
+            scenes=scenes,
+            auto_proceed_on_invalid_transition=stream_dict.get('auto_proceed_on_invalid_transition', False)
         )
         
         youtube_settings = None
@@ -17,10 +17,25 @@ class OBSConnectionInterface(ABC):
         """OBSから切断する"""
         pass
     
+    @abstractmethod
+    def reconnect(self) -> Any:
+        """古い接続を閉じてOBSに接続し直す"""
+        pass
+    
     @abstractmethod
     def get_client(self) -> Any:
         """WebSocketクライアントを取得する"""
         pass
+    
+    @abstractmethod
+    def send(self, request: str, data: Optional[Dict[str, Any]] = None) -> Any:
+        """リクエストを1件送信する"""
+        pass
+    
+    @abstractmethod
+    def send_batch(self, requests: List[Dict[str, Any]], halt_on_failure: bool = False) -> List[Dict[str, Any]]:
+        """複数のリクエストを1回の往復でまとめて送信する"""
+        pass
 
 class SceneManagerInterface(ABC):
     """シーン管理のインターフェース"""
@@ -30,6 +45,11 @@ class SceneManagerInterface(ABC):
         """OBSで利用可能なシーンのリストを取得する"""
         pass
     
+    @abstractmethod
+    def invalidate_scenes(self) -> None:
+        """シーンリストのキャッシュを破棄する"""
+        pass
+    
     @abstractmethod
     def switch_to_scene(self, scene_name: str) -> bool:
         """指定したシーンに切り替える"""
@@ -39,6 +59,16 @@ class SceneManagerInterface(ABC):
     def update_text_source(self, source_name: str, text: str) -> bool:
         """指定したテキストソースのテキストを更新する"""
         pass
+    
+    @abstractmethod
+    def update_date_text(self, source_name: str = "text") -> bool:
+        """指定したテキストソースに現在の日時を設定する"""
+        pass
+    
+    @abstractmethod
+    def build_switch_request(self, scene_name: str) -> Optional[Dict[str, Any]]:
+        """シーン切り替えのバッチ用リクエストを作成する（シーンが存在しない場合はNone）"""
+        pass
 
 class StreamControlInterface(ABC):
     """配信制御のインターフェース"""
@@ -53,6 +83,16 @@ class StreamControlInterface(ABC):
         """配信を停止する"""
         pass
     
+    @abstractmethod
+    def build_start_request(self) -> Dict[str, Any]:
+        """配信開始のバッチ用リクエストを作成する"""
+        pass
+    
+    @abstractmethod
+    def prepare_start(self) -> None:
+        """バッチで配信を開始する前に配信状態をリセットする"""
+        pass
+    
     @abstractmethod
     def is_streaming(self) -> bool:
         """現在配信中かどうかを確認する"""
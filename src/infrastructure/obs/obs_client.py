@@ -1,13 +1,62 @@
 """
 OBS WebSocket接続を管理するモジュール
 """
-import obsws_python as obsws
+import logging
+import socket
+import threading
+import uuid
+
+try:
+    import orjson
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+    import json
+    _dumps = json.dumps
+    _loads = json.loads
 from src.domain.interfaces.obs_interface import OBSConnectionInterface
 
+logger = logging.getLogger(__name__)
+
+def send_request_batch(client, requests, halt_on_failure=False):
+    """
+    複数のリクエストをRequestBatch(op 8)で1回の往復にまとめて送信する
+    
+    obsws-pythonはRequestBatchを公開していないため、下層のWebSocketに直接送信する。
+    次に届いたフレームを応答として受信するため、同じクライアントへの他の送信とは
+    OBSClient.lockで排他する必要がある。
+    リクエストは記述した順に逐次実行される（SerialRealtime）
+    
+    Args:
+        client (obsws.ReqClient): 接続済みのクライアント
+        requests (list): {"requestType": ..., "requestData": ...}形式の辞書のリスト
+        halt_on_failure (bool): Trueの場合、失敗したリクエスト以降は実行されない
+        
+    Returns:
+        list: 実行された各リクエストの結果（requestStatus, responseDataを含む辞書）
+    """
+    base_client = client.base_client
+    request_id = str(uuid.uuid4())
+    payload = {
+        "op": 8,
+        "d": {
+            "requestId": request_id,
+            "haltOnFailure": halt_on_failure,
+            "requests": requests
+        }
+    }
+    base_client.ws.send(_dumps(payload))
+    response = _loads(base_client.ws.recv())
+    
+    data = response.get("d", {})
+    if data.get("requestId") != request_id:
+        raise ConnectionError(f"RequestBatchの応答IDが一致しません: {data.get('requestId')}")
+    return data.get("results", [])
+
 class OBSClient(OBSConnectionInterface):
     """OBS WebSocketサーバーへの接続を管理するクラス"""
     
-    def __init__(self, host="localhost", port=4455, password=""):
+    def __init__(self, host="localhost", port=4455, password="", existing_client=None):
         """
         OBS WebSocketへの接続を初期化する
         
@@ -15,11 +64,17 @@ class OBSClient(OBSConnectionInterface):
             host (str): ホスト名またはIPアドレス
             port (int): ポート番号（OBS WebSocket v5のデフォルトは4455）
             password (str): WebSocketサーバーのパスワード
+            existing_client (obsws.ReqClient, optional): 接続済みのクライアント。
+                指定した場合、最初のconnect()で新たに接続せずにそのまま使用する
         """
         self.host = host
         self.port = port
         self.password = password
         self.client = None
+        self._existing_client = existing_client
+        # obsws-pythonのクライアントはスレッドセーフではなく、RequestBatchは応答を直接受信するため、
+        # このクライアントを使うすべての送信（シーン管理・配信制御・配信サービス）をこのロックで直列化する
+        self.lock = threading.RLock()
     
     def connect(self):
         """
@@ -28,21 +83,80 @@ class OBSClient(OBSConnectionInterface):
         Returns:
             obsws.ReqClient: 接続済みのクライアントインスタンス
         """
+        # 接続済みのクライアントが渡されていれば再接続せずに使い回す（一度だけ）
+        if self._existing_client is not None:
+            self.client = self._existing_client
+            self._existing_client = None
+            return self.client
+        
+        # obsws_pythonは接続時に読み込む
+        import obsws_python as obsws
         self.client = obsws.ReqClient(
             host=self.host, 
             port=self.port, 
             password=self.password
         )
         # obsws-pythonライブラリでは、クライアントが正常に作成されたら接続されています
-        print("OBS WebSocketに接続しました")
+        self._disable_nagle(self.client)
+        logger.info("OBS WebSocketに接続しました")
         return self.client
     
+    @staticmethod
+    def _disable_nagle(client):
+        """
+        WebSocketのソケットでNagleアルゴリズムを無効化する（TCP_NODELAY）
+        
+        小さな制御メッセージが送信バッファで待たされないようにする
+        
+        Args:
+            client (obsws.ReqClient): 接続済みのクライアント
+        """
+        try:
+            sock = client.base_client.ws.sock
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except (AttributeError, OSError) as e:
+            logger.warning("TCP_NODELAYの設定をスキップしました: %s", e)
+    
     def disconnect(self):
         """OBS WebSocketサーバーから切断する"""
-        if self.client:
-            # obsws-pythonでは明示的なdisconnectは必要ありません
-            self.client = None
-            print("OBS WebSocketから切断しました")
+        with self.lock:
+            if self.client:
+                self._close(self.client)
+                self.client = None
+                logger.info("OBS WebSocketから切断しました")
+    
+    def reconnect(self):
+        """
+        古いソケットを閉じて同じ接続情報で接続し直す
+        
+        クライアントを使う各コンポーネントはget_client()経由で取得するため、
+        ここで作り直したクライアントがすべてのコンポーネントに反映される
+        
+        Returns:
+            obsws.ReqClient: 新しく接続したクライアントインスタンス
+        """
+        with self.lock:
+            if self.client:
+                self._close(self.client)
+                self.client = None
+            return self.connect()
+    
+    @staticmethod
+    def _close(client):
+        """
+        クライアントのWebSocketを閉じる（既に切断されている場合のエラーは無視する）
+        
+        Args:
+            client (obsws.ReqClient): 閉じるクライアント
+        """
+        try:
+            disconnect = getattr(client, 'disconnect', None)
+            if disconnect is not None:
+                disconnect()
+            else:
+                client.base_client.ws.close()
+        except Exception as e:
+            logger.debug("OBS WebSocketのクローズをスキップしました: %s", e)
     
     def get_client(self):
         """
@@ -53,4 +167,32 @@ class OBSClient(OBSConnectionInterface):
         """
         if not self.client:
             self.connect()
-        return self.client 
\ No newline at end of file
+        return self.client
+    
+    def send(self, request, data=None):
+        """
+        リクエストを1件送信する
+        
+        Args:
+            request (str): リクエストタイプ
+            data (dict, optional): リクエストデータ
+            
+        Returns:
+            リクエストのレスポンス
+        """
+        with self.lock:
+            return self.get_client().send(request, data)
+    
+    def send_batch(self, requests, halt_on_failure=False):
+        """
+        複数のリクエストをRequestBatch(op 8)で1回の往復にまとめて送信する
+        
+        Args:
+            requests (list): {"requestType": ..., "requestData": ...}形式の辞書のリスト
+            halt_on_failure (bool): Trueの場合、失敗したリクエスト以降は実行されない
+            
+        Returns:
+            list: 実行された各リクエストの結果（requestStatus, responseDataを含む辞書）
+        """
+        with self.lock:
+            return send_request_batch(self.get_client(), requests, halt_on_failure)
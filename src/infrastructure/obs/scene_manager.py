@@ -1,91 +1,251 @@
 """
 OBSのシーン管理機能を提供するモジュール
 """
-import obsws_python as obsws
-from typing import List, Optional, Dict, Any
-from src.domain.interfaces.obs_interface import SceneManagerInterface
+import logging
+import operator
+import time
+from typing import List, Optional, Dict, Any, FrozenSet, Set, Tuple, Callable
+from src.domain.interfaces.obs_interface import OBSConnectionInterface, SceneManagerInterface
+
+logger = logging.getLogger(__name__)
+
+# シーンリストキャッシュの有効期間（秒）
+SCENES_CACHE_TTL = 30.0
+
+# OBS WebSocket v5のリクエストステータス: ResourceNotFound
+_RESOURCE_NOT_FOUND = 600
+
+# 現在のシーン名を保持している可能性のある属性名とキー名（優先順）
+_CURRENT_SCENE_ATTRS = ('current_program_scene_name', 'sceneName', 'name', 'scene_name')
+_CURRENT_SCENE_KEYS = ('currentProgramSceneName', 'sceneName', 'name', 'current_program_scene_name', 'scene_name')
+
+def _item_field(item: Any, *names: str, default: Any = None) -> Any:
+    """
+    辞書キーまたは属性から最初に見つかったフィールドの値を取得する
+    
+    Args:
+        item: 辞書またはオブジェクト
+        names: 候補となるフィールド名
+        default: いずれも見つからない場合の値
+        
+    Returns:
+        フィールドの値またはデフォルト値
+    """
+    for name in names:
+        if isinstance(item, dict):
+            if name in item:
+                return item[name]
+        elif hasattr(item, name):
+            return getattr(item, name)
+    return default
+
+def _is_not_found_error(error: Exception) -> bool:
+    """
+    OBSのリクエストエラーが「リソースが見つからない」ことを示すかどうかを判定する
+    
+    obsws-python 1.4系の例外はcode属性を持たず、メッセージが
+    "Request SetInputSettings returned code 600" の形式になるため、メッセージ中のコードも照合する
+    
+    Args:
+        error: リクエスト送信時に発生した例外
+        
+    Returns:
+        bool: 入力などが見つからないことによるエラーの場合はTrue
+    """
+    if getattr(error, 'code', None) == _RESOURCE_NOT_FOUND:
+        return True
+    message = str(error).lower()
+    return (f"code {_RESOURCE_NOT_FOUND}" in message
+            or 'not found' in message or 'no source' in message)
 
 class SceneManager(SceneManagerInterface):
     """OBSのシーンを管理するクラス"""
     
-    def __init__(self, client: obsws.ReqClient):
+    def __init__(self, connection: OBSConnectionInterface):
         """
         SceneManagerを初期化する
         
         Args:
-            client (obsws.ReqClient): OBS WebSocketリクエストクライアント
+            connection (OBSConnectionInterface): OBS接続。再接続後も同じ接続を使えるよう、
+                クライアントではなく接続を保持してリクエストを送信する
         """
-        self.client = client
+        self.connection = connection
+        # シーンリストのキャッシュ (シーン名のリスト, シーン名の集合, 取得時刻)
+        self._scenes_cache = (None, frozenset(), 0.0)
+        # 日付テキストの日付部分のキャッシュ ((年, 年内通算日), "[yyyy/MM/dd ")
+        self._date_prefix_cache = (None, "")
+        # テキストソースごとに最後に設定したテキスト
+        self._last_text: Dict[str, str] = {}
+        # 更新に成功したことのある（存在が確認できている）入力ソース名
+        self._known_inputs: Set[str] = set()
+        # レスポンス形式はプロセス中で変わらないため、一度判定した取り出し方を使い回す
+        self._scene_list_extractor: Optional[Callable[[Any], Any]] = None
+        self._current_scene_extractor: Optional[Callable[[Any], Any]] = None
     
     def get_scenes(self) -> List[str]:
         """
         OBSで利用可能なシーンのリストを取得する
         
+        シーンリストは滅多に変わらないため、一定時間キャッシュする。
+        切り替えに失敗した場合やOBSのシーン変更イベントを受けた場合はinvalidate_scenesで破棄される。
+        
+        Returns:
+            list: シーン名のリスト
+        """
+        scenes, _ = self._load_scenes()
+        return list(scenes)
+    
+    def _load_scenes(self) -> Tuple[List[str], FrozenSet[str]]:
+        """
+        キャッシュが有効であればキャッシュから、無効であればOBSからシーンを取得する
+        
+        Returns:
+            Tuple[List[str], FrozenSet[str]]: (シーン名のリスト, 存在確認用のシーン名の集合)
+        """
+        scenes, scene_set, fetched_at = self._scenes_cache
+        if scenes is not None and time.monotonic() - fetched_at < SCENES_CACHE_TTL:
+            return scenes, scene_set
+        
+        scenes = self._fetch_scenes()
+        scene_set = frozenset(scenes)
+        if scenes:
+            self._scenes_cache = (scenes, scene_set, time.monotonic())
+        return scenes, scene_set
+    
+    def _fetch_scenes(self) -> List[str]:
+        """
+        OBSからシーンのリストを取得する
+        
         Returns:
             list: シーン名のリスト
         """
         try:
             # OBS WebSocket v5 APIを使用
-            response = self.client.send("GetSceneList")
+            response = self.connection.send("GetSceneList")
+            
+            scenes_data = self._extract_scene_list(response)
             
-            # レスポンスの処理方法はAPIのバージョンによって異なる
             scenes = []
+            if isinstance(scenes_data, list):
+                for scene in scenes_data:
+                    scene_name = _item_field(scene, 'sceneName')
+                    if scene_name is not None:
+                        scenes.append(scene_name)
             
-            if hasattr(response, 'scenes'):
-                # 直接scenesアトリビュートが存在する場合
-                scenes_data = response.scenes
-                if isinstance(scenes_data, list):
-                    for scene in scenes_data:
-                        if isinstance(scene, dict) and 'sceneName' in scene:
-                            scenes.append(scene['sceneName'])
-                        elif hasattr(scene, 'sceneName'):
-                            scenes.append(scene.sceneName)
+            if not scenes:
+                logger.warning("シーンリストを取得できません - レスポンス形式が不明です")
+                logger.debug("GetSceneList レスポンス: %r", response)
             
-            # 別の形式の場合（辞書形式など）
-            elif hasattr(response, '__dict__') and 'scenes' in response.__dict__:
-                scenes_data = response.__dict__['scenes']
-                if isinstance(scenes_data, list):
-                    for scene in scenes_data:
-                        if isinstance(scene, dict) and 'sceneName' in scene:
-                            scenes.append(scene['sceneName'])
-                        elif hasattr(scene, 'sceneName'):
-                            scenes.append(scene.sceneName)
+            logger.debug("利用可能なシーン: %s", scenes)
+            return scenes
+        except Exception as e:
+            logger.error("シーンリスト取得エラー: %s", e)
+            return []
+    
+    def _extract_scene_list(self, response: Any) -> Any:
+        """
+        GetSceneListのレスポンスからシーンデータを取り出す
+        
+        初回のみレスポンス形式を判定し、以降は判定済みの取り出し方を直接使う
+        
+        Args:
+            response: GetSceneListのレスポンス
             
+        Returns:
+            シーンデータのリスト、または取り出せない場合はNone
+        """
+        extractor = self._scene_list_extractor
+        if extractor is not None:
+            try:
+                return extractor(response)
+            except (AttributeError, KeyError, TypeError):
+                self._scene_list_extractor = None
+        
+        # レスポンスの処理方法はAPIのバージョンによって異なる
+        if hasattr(response, 'scenes'):
+            # 直接scenesアトリビュートが存在する場合
+            extractor = operator.attrgetter('scenes')
+        elif hasattr(response, '__dict__') and 'scenes' in response.__dict__:
+            # 別の形式の場合（辞書形式など）
+            extractor = lambda r: r.__dict__['scenes']
+        elif hasattr(response, 'getScenes'):
             # プロパティ属性から取得を試みる
-            elif hasattr(response, 'getScenes'):
-                scenes_data = response.getScenes()
-                if isinstance(scenes_data, list):
-                    for scene in scenes_data:
-                        if isinstance(scene, dict) and 'sceneName' in scene:
-                            scenes.append(scene['sceneName'])
-                        elif hasattr(scene, 'sceneName'):
-                            scenes.append(scene.sceneName)
-            
+            extractor = operator.methodcaller('getScenes')
+        elif hasattr(response, 'responseData'):
             # responseDataプロパティから取得を試みる
-            elif hasattr(response, 'responseData'):
-                response_data = response.responseData
-                if isinstance(response_data, dict) and 'scenes' in response_data:
-                    scenes_data = response_data['scenes']
-                    if isinstance(scenes_data, list):
-                        for scene in scenes_data:
-                            if isinstance(scene, dict) and 'sceneName' in scene:
-                                scenes.append(scene['sceneName'])
-                            elif hasattr(scene, 'sceneName'):
-                                scenes.append(scene.sceneName)
+            extractor = lambda r: _item_field(r.responseData, 'scenes')
+        else:
+            return None
+        
+        self._scene_list_extractor = extractor
+        return extractor(response)
+    
+    def _extract_current_scene(self, response: Any) -> Optional[str]:
+        """
+        GetCurrentProgramSceneのレスポンスからシーン名を取り出す
+        
+        初回のみレスポンス形式を判定し、以降は判定済みの取り出し方を直接使う
+        
+        Args:
+            response: GetCurrentProgramSceneのレスポンス
             
-            # 最終手段：クラスの全属性をダンプして調査
-            if not scenes:
-                print("シーンリストを取得できません - レスポンス形式が不明です")
-                print(f"レスポンスのタイプ: {type(response)}")
-                print(f"レスポンスの属性: {dir(response)}")
-                if hasattr(response, '__dict__'):
-                    print(f"レスポンスの__dict__: {response.__dict__}")
+        Returns:
+            str or None: シーン名、または既知の形式で取り出せない場合はNone
+        """
+        extractor = self._current_scene_extractor
+        if extractor is not None:
+            try:
+                return extractor(response)
+            except (AttributeError, KeyError, TypeError):
+                # 失敗した取り出し方を再び使わないよう、ローカル変数も破棄して判定し直す
+                self._current_scene_extractor = None
+                extractor = None
+        
+        # データクラスの直接アクセス
+        if isinstance(response, dict):
+            # 辞書形式のレスポンス用
+            for key in _CURRENT_SCENE_KEYS:
+                if key in response:
+                    extractor = operator.itemgetter(key)
+                    break
+        else:
+            for attr in _CURRENT_SCENE_ATTRS:
+                if hasattr(response, attr):
+                    extractor = operator.attrgetter(attr)
+                    break
+        
+        if extractor is None:
+            return None
+        self._current_scene_extractor = extractor
+        return extractor(response)
+    
+    def invalidate_scenes(self) -> None:
+        """シーンリストのキャッシュを破棄する"""
+        self._scenes_cache = (None, frozenset(), 0.0)
+    
+    def _has_scene(self, scene_name: str) -> bool:
+        """
+        シーンが存在するか確認する
+        
+        キャッシュに無い場合は、キャッシュ後に追加されたシーンの可能性があるため一度だけ取得し直す
+        
+        Args:
+            scene_name (str): 確認するシーン名
             
-            print(f"利用可能なシーン: {scenes}")
-            return scenes
-        except Exception as e:
-            print(f"シーンリスト取得エラー: {str(e)}")
-            return []
+        Returns:
+            bool: シーンが存在する場合はTrue
+        """
+        cached = self._scenes_cache[0] is not None
+        available_scenes, available_set = self._load_scenes()
+        if scene_name not in available_set and cached:
+            self.invalidate_scenes()
+            available_scenes, available_set = self._load_scenes()
+        
+        if scene_name not in available_set:
+            logger.error("シーン '%s' は存在しません", scene_name)
+            logger.info("利用可能なシーン: %s", available_scenes)
+            return False
+        return True
     
     def switch_to_scene(self, scene_name: str) -> bool:
         """
@@ -98,23 +258,34 @@ class SceneManager(SceneManagerInterface):
             bool: 成功した場合はTrue
         """
         try:
-            # 利用可能なシーンを確認
-            available_scenes = self.get_scenes()
-            
             # 指定されたシーンが存在するか確認
-            if scene_name not in available_scenes:
-                print(f"シーン '{scene_name}' は存在しません")
-                print(f"利用可能なシーン: {available_scenes}")
+            if not self._has_scene(scene_name):
                 return False
             
             # obs-websocket v5のSetCurrentProgramSceneコマンドを使用
-            self.client.send("SetCurrentProgramScene", {"sceneName": scene_name})
-            print(f"シーンを '{scene_name}' に切り替えました")
+            self.connection.send("SetCurrentProgramScene", {"sceneName": scene_name})
+            logger.info("シーンを '%s' に切り替えました", scene_name)
             return True
         except Exception as e:
-            print(f"シーン切り替えエラー: {str(e)}")
+            logger.error("シーン切り替えエラー: %s", e)
+            # キャッシュが古い可能性があるため次回は取得し直す
+            self.invalidate_scenes()
             return False
     
+    def build_switch_request(self, scene_name: str) -> Optional[Dict[str, Any]]:
+        """
+        シーン切り替えのバッチ用リクエストを作成する
+        
+        Args:
+            scene_name (str): 切り替え先のシーン名
+            
+        Returns:
+            dict or None: SetCurrentProgramSceneのリクエスト。シーンが存在しない場合はNone
+        """
+        if not self._has_scene(scene_name):
+            return None
+        return {"requestType": "SetCurrentProgramScene", "requestData": {"sceneName": scene_name}}
+    
     def update_text_source(self, source_name: str, text: str) -> bool:
         """
         テキストソースのテキストを更新する
@@ -126,67 +297,78 @@ class SceneManager(SceneManagerInterface):
         Returns:
             bool: 成功した場合はTrue
         """
+        # テキストソースを更新するのはこのクラスだけなので、前回と同じテキストなら送信しない
+        if self._last_text.get(source_name) == text:
+            return True
+        # 失敗した場合に古いテキストと一致して送信が省略されないよう、先に破棄しておく
+        self._last_text.pop(source_name, None)
+        
         try:
             # 現在のシーンに依存せずに直接入力設定を更新
             # OBS WebSocket v5の SetInputSettings リクエストを使用
-            print(f"テキストソース '{source_name}' を更新: {text}")
+            logger.debug("テキストソース '%s' を更新: %s", source_name, text)
             
             # シンプルな実装 - 直接SetInputSettingsコマンドを使用
+            request_data = {
+                "inputName": source_name,
+                "inputSettings": {
+                    "text": text
+                }
+            }
             try:
-                response = self.client.send(
-                    "SetInputSettings",
-                    {
-                        "inputName": source_name,
-                        "inputSettings": {
-                            "text": text
-                        }
-                    }
-                )
-                print(f"テキスト更新レスポンス: {response}")
+                response = self.connection.send("SetInputSettings", request_data)
+                logger.debug("テキスト更新レスポンス: %r", response)
+                self._known_inputs.add(source_name)
+                self._last_text[source_name] = text
                 return True
             except Exception as e:
-                print(f"テキスト更新エラー (1): {str(e)}")
+                logger.warning("テキスト更新エラー (1): %s", e)
+                
+                # 存在が確認済みの入力で「見つからない」以外のエラーなら一時的な失敗とみなし、
+                # 入力一覧を取り直さずにそのまま再試行する
+                if source_name in self._known_inputs and not _is_not_found_error(e):
+                    try:
+                        self.connection.send("SetInputSettings", request_data)
+                        self._last_text[source_name] = text
+                        return True
+                    except Exception as retry_error:
+                        logger.error("テキスト更新エラー (再試行): %s", retry_error)
+                        return False
                 
-                # 入力を確認してみる
+                # 入力の確認と再試行をRequestBatchで1回の往復にまとめる
                 try:
-                    inputs = self.client.send("GetInputList")
-                    print(f"利用可能な入力一覧: {inputs}")
+                    results = self.connection.send_batch([
+                        {"requestType": "GetInputList"},
+                        {"requestType": "SetInputSettings", "requestData": request_data}
+                    ])
+                    inputs = results[0].get("responseData", {}).get("inputs", []) if results else []
+                    # 入力一覧は大きくなりうるため、DEBUG時のみ遅延フォーマットで出力
+                    logger.debug("利用可能な入力一覧: %r", inputs)
                     
                     # 入力が存在するか確認
-                    input_exists = False
-                    if hasattr(inputs, 'inputs'):
-                        for input_item in inputs.inputs:
-                            input_name = None
-                            if isinstance(input_item, dict) and 'inputName' in input_item:
-                                input_name = input_item['inputName']
-                            elif hasattr(input_item, 'inputName'):
-                                input_name = input_item.inputName
-                                
-                            if input_name == source_name:
-                                input_exists = True
-                                break
+                    input_exists = any(
+                        _item_field(input_item, 'inputName') == source_name for input_item in inputs
+                    )
                     
                     if not input_exists:
-                        print(f"警告: 入力ソース '{source_name}' が見つかりません")
-                        print("テキストソースを作成する必要があります")
+                        self._known_inputs.discard(source_name)
+                        logger.warning("入力ソース '%s' が見つかりません", source_name)
+                        logger.warning("テキストソースを作成する必要があります")
                         return False
                     
-                    # 最終的に再度試行
-                    response = self.client.send(
-                        "SetInputSettings",
-                        {
-                            "inputName": source_name,
-                            "inputSettings": {
-                                "text": text
-                            }
-                        }
-                    )
+                    # 同じバッチで実行した再試行の結果を確認
+                    status = results[1].get("requestStatus", {}) if len(results) > 1 else {}
+                    if not status.get("result"):
+                        logger.error("テキスト更新エラー (再試行): %s", status.get("comment"))
+                        return False
+                    self._known_inputs.add(source_name)
+                    self._last_text[source_name] = text
                     return True
                 except Exception as list_error:
-                    print(f"入力リスト取得エラー: {str(list_error)}")
+                    logger.error("入力リスト取得エラー: %s", list_error)
                     return False
         except Exception as e:
-            print(f"テキストソース更新エラー (2): {str(e)}")
+            logger.error("テキストソース更新エラー (2): %s", e)
             return False
     
     def _get_current_scene(self) -> Optional[str]:
@@ -198,63 +380,29 @@ class SceneManager(SceneManagerInterface):
         """
         try:
             # obs-websocket v5では、GetCurrentProgramSceneでシーン名を取得
-            response = self.client.send("GetCurrentProgramScene")
+            response = self.connection.send("GetCurrentProgramScene")
             
             # OBS WebSocket v5固有のレスポンス処理を追加
             try:
-                # データクラスのattrsメソッドを使ってアクセス
-                if hasattr(response, '__class__') and hasattr(response, '__dict__'):
-                    if 'current_program_scene_name' in response.__dict__:
-                        return response.__dict__['current_program_scene_name']
-                    elif 'scene_name' in response.__dict__:
-                        return response.__dict__['scene_name']
-                
-                # データクラスの直接アクセス
-                if hasattr(response, 'current_program_scene_name'):
-                    return response.current_program_scene_name
-                elif hasattr(response, 'sceneName'):
-                    return response.sceneName
-                elif hasattr(response, 'name'):
-                    return response.name
-                elif hasattr(response, 'scene_name'):
-                    return response.scene_name
-                
-                # 以下は辞書形式のレスポンス用
-                if isinstance(response, dict):
-                    if 'currentProgramSceneName' in response:
-                        return response['currentProgramSceneName']
-                    elif 'sceneName' in response:
-                        return response['sceneName']
-                    elif 'name' in response:
-                        return response['name']
-                    elif 'current_program_scene_name' in response:
-                        return response['current_program_scene_name']
-                    elif 'scene_name' in response:
-                        return response['scene_name']
+                scene_name = self._extract_current_scene(response)
+                if scene_name is not None:
+                    return scene_name
                 
-                # 上記の方法でシーン名が取得できない場合は、__dict__の内容をデバッグ出力
+                # 上記の方法でシーン名が取得できない場合は、__dict__から候補を探す
                 if hasattr(response, '__dict__'):
-                    print(f"応答の__dict__内容: {response.__dict__}")
                     for key, value in response.__dict__.items():
                         if isinstance(key, str) and ('scene' in key.lower() or 'name' in key.lower()):
-                            print(f"候補キー '{key}' の値: {value}")
+                            logger.debug("候補キー '%s' の値: %s", key, value)
                             return value  # 最初の候補を返す
                 
             except Exception as debug_e:
-                print(f"レスポンス解析中のデバッグエラー: {debug_e}")
+                logger.debug("レスポンス解析中のデバッグエラー: %s", debug_e)
             
             # デバッグ情報
-            print("現在のシーンを特定できません - 不明なレスポンス形式")
-            print(f"レスポンスタイプ: {type(response)}")
-            print(f"レスポンス属性: {dir(response)}")
-            
-            # dataclass_fieldsが存在するか確認
-            if hasattr(response, '__dataclass_fields__'):
-                print(f"データクラスフィールド: {response.__dataclass_fields__}")
+            logger.warning("現在のシーンを特定できません - 不明なレスポンス形式")
+            logger.debug("GetCurrentProgramScene レスポンス: %r", response)
             
             if hasattr(response, '__dict__'):
-                print(f"レスポンス__dict__: {response.__dict__}")
-                
                 # もし辞書に'Scene'または'scene'を含むキーがあれば、そこから取得を試みる
                 for key, value in response.__dict__.items():
                     if 'scene' in key.lower():
@@ -269,7 +417,7 @@ class SceneManager(SceneManagerInterface):
             
             return None
         except Exception as e:
-            print(f"現在のシーン取得エラー: {str(e)}")
+            logger.error("現在のシーン取得エラー: %s", e)
             return None
     
     def update_date_text(self, source_name="text"):
@@ -284,10 +432,16 @@ class SceneManager(SceneManagerInterface):
         """
         try:
             # 現在の日付を[yyyy/MM/dd HH:mm:ss]形式で取得
-            current_date = datetime.datetime.now().strftime("[%Y/%m/%d %H:%M:%S]")
+            lt = time.localtime()
+            day = (lt.tm_year, lt.tm_yday)
+            cached_day, prefix = self._date_prefix_cache
+            if day != cached_day:
+                prefix = time.strftime("[%Y/%m/%d ", lt)
+                self._date_prefix_cache = (day, prefix)
+            current_date = f"{prefix}{lt.tm_hour:02d}:{lt.tm_min:02d}:{lt.tm_sec:02d}]"
             
             # テキストソースを更新
             return self.update_text_source(source_name, current_date)
         except Exception as e:
-            print(f"日付テキスト更新エラー: {str(e)}")
+            logger.error("日付テキスト更新エラー: %s", e)
             return False 
\ No newline at end of file
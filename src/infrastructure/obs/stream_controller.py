@@ -1,28 +1,72 @@
 """
 OBSの配信制御機能を提供するモジュール
 """
+import itertools
+import logging
+import operator
 import time
 import threading
-import obsws_python as obsws
-import json
-from src.domain.interfaces.obs_interface import StreamControlInterface, SceneManagerInterface
+from src.config.settings import load_config
+from src.domain.interfaces.obs_interface import OBSConnectionInterface, StreamControlInterface, SceneManagerInterface
+
+logger = logging.getLogger(__name__)
+
+# 配信状態キャッシュの有効期間（秒）
+STATUS_CACHE_TTL = 0.5
+
+# OBS WebSocket v5のリクエストステータス（OutputRunning / OutputNotRunning）と、
+# コードが得られない場合に照合するエラーメッセージ
+_OUTPUT_RUNNING = 500
+_OUTPUT_NOT_RUNNING = 501
+_ALREADY_ACTIVE = ("already active", "output running")
+_NOT_ACTIVE = ("not active", "not running")
+
+def _error_matches(error, code, tags):
+    """
+    OBSのエラーが指定したステータスを示すかどうかを判定する
+    
+    obsws-python 1.4系の例外はcode属性を持たず、メッセージが
+    "Request StartStream returned code 500" の形式になるため、メッセージ中のコードも照合する
+    
+    Args:
+        error: リクエスト送信時に発生した例外
+        code (int): 期待するリクエストステータスコード
+        tags (tuple): コードが得られない場合に照合するメッセージ（小文字）
+        
+    Returns:
+        bool: 一致する場合はTrue
+    """
+    error_code = getattr(error, 'code', None)
+    if error_code is not None:
+        return error_code == code
+    message = str(error).lower()
+    return f"code {code}" in message or any(tag in message for tag in tags)
+
+# 接続先ごとのイベントクライアント（コントローラー間で1つの接続を共有する）
+_event_clients = {}
 
 class OBSStreamController(StreamControlInterface):
     """OBSの配信を制御するクラス"""
     
-    def __init__(self, client: obsws.ReqClient, scene_manager: SceneManagerInterface, config_file: str = None):
+    def __init__(self, connection: OBSConnectionInterface, scene_manager: SceneManagerInterface, config_file: str = None):
         """
         StreamControllerを初期化する
         
         Args:
-            client (obsws.ReqClient): OBS WebSocketリクエストクライアント
+            connection (OBSConnectionInterface): OBS接続（シーン管理と共有する）
             scene_manager (SceneManagerInterface): シーン管理インスタンス
             config_file (str, optional): 設定ファイルのパス
         """
-        self.client = client
+        self.connection = connection
         self.scene_manager = scene_manager
         self.streaming = False
         self.streaming_event = threading.Event()
+        # シーン切り替えループの停止要求
+        self._scene_switch_stop = threading.Event()
+        # 直前に確認した配信状態 (配信中かどうか, 確認時刻)
+        self._last_status = None
+        # GetStreamStatusのレスポンスから配信状態を取り出す関数（初回に判定）
+        self._status_accessor = None
         
         # OBS接続情報をconfig.jsonから取得
         host = "localhost"
@@ -31,82 +75,90 @@ class OBSStreamController(StreamControlInterface):
         
         if config_file:
             try:
-                with open(config_file, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                    obs_config = config.get('obs', {})
-                    host = obs_config.get('host', host)
-                    port = obs_config.get('port', port)
-                    password = obs_config.get('password', password)
-            except Exception as e:
-                print(f"設定ファイルの読み込みエラー: {e}")
-        
-        # イベントクライアントを作成
-        self.event_client = obsws.EventClient(
-            host=host,
-            port=port,
-            password=password
-        )
+                config = load_config(config_file)
+                obs_config = config.get('obs', {})
+                host = obs_config.get('host', host)
+                port = obs_config.get('port', port)
+                password = obs_config.get('password', password)
+            except (OSError, ValueError) as e:
+                logger.error("設定ファイルの読み込みエラー: %s", e)
+        
+        # OBSとの通信で発生しうるエラー（接続エラーとリクエストの失敗）
+        # websocket-clientはobsws-pythonの依存パッケージ
+        from obsws_python.error import OBSSDKError
+        from websocket import WebSocketException
+        self._connection_errors = (OSError, WebSocketException)
+        self._obs_errors = (OBSSDKError,) + self._connection_errors
+        
+        # イベントクライアントを取得（同じ接続先のものがあれば共有する）
+        key = (host, port, password)
+        event_client = _event_clients.get(key)
+        if event_client is None:
+            # obsws_pythonは使用時に読み込む
+            import obsws_python as obsws
+            # 使うイベントはStreamStateChanged(Outputs)とSceneListChanged(Scenes)のみのため、
+            # それ以外のカテゴリーはOBS側で送信しないように購読を絞る
+            event_client = obsws.EventClient(
+                host=host,
+                port=port,
+                password=password,
+                subs=obsws.Subs.OUTPUTS | obsws.Subs.SCENES
+            )
+            _event_clients[key] = event_client
+        self.event_client = event_client
         
         # イベントハンドラを登録
-        self.event_client.callback.register(self._on_stream_status)
-        print("OBS WebSocketイベントリスナーを開始しました")
+        # obsws-pythonは関数名(on_<イベント名>)でイベントを振り分ける
+        self.event_client.callback.register([
+            self.on_stream_state_changed,
+            self.on_scene_list_changed,
+        ])
+        logger.info("OBS WebSocketイベントリスナーを開始しました")
     
-    def _on_stream_status(self, message):
+    def _send(self, request: str, data: dict = None):
         """
-        配信状態変更イベントのコールバック
+        OBSにリクエストを送信する。接続が切れていた場合は一度だけ再接続して再送する
         
         Args:
-            message: OBS WebSocketからのメッセージ
+            request (str): リクエストタイプ
+            data (dict, optional): リクエストデータ
+            
+        Returns:
+            リクエストのレスポンス
         """
         try:
-            # イベント情報をデバッグ出力
-            print(f"配信イベント受信: {message}")
-            
-            # イベントタイプがストリーム開始イベントかどうかを確認
-            event_type = getattr(message, 'eventType', None)
-            if event_type is None:
-                try:
-                    event_type = message.getEventType()
-                except:
-                    event_type = str(message)
-            
-            print(f"イベントタイプ: {event_type}")
-            
-            # ストリーム開始イベントの処理（v4とv5で異なる）
-            if 'StreamStarted' in str(event_type) or 'OutputStateChanged' in str(event_type) or 'OutputActive' in str(event_type):
-                try:
-                    # イベントデータを取得（v5形式）
-                    event_data = None
-                    try:
-                        event_data = message.getEventData()
-                    except:
-                        # v5でない場合は他の方法を試す
-                        event_data = message
-                    
-                    print(f"イベントデータ: {event_data}")
-                    
-                    # 出力状態をチェック
-                    output_active = False
-                    
-                    # v5: outputActiveフィールドをチェック
-                    if hasattr(event_data, 'outputActive'):
-                        output_active = event_data.outputActive
-                    elif isinstance(event_data, dict) and 'outputActive' in event_data:
-                        output_active = event_data['outputActive']
-                    # v4: outputStateフィールドをチェック
-                    elif hasattr(event_data, 'outputState'):
-                        output_active = event_data.outputState == 'OBS_WEBSOCKET_OUTPUT_STARTED'
-                    elif isinstance(event_data, dict) and 'outputState' in event_data:
-                        output_active = event_data['outputState'] == 'OBS_WEBSOCKET_OUTPUT_STARTED'
-                    
-                    if output_active:
-                        print("ストリーム開始イベントを検出！")
-                        self.streaming_event.set()
-                    
-                except Exception as e:
-                    print(f"イベントデータ処理エラー: {e}")
-        except Exception as e:
-            print(f"ストリームイベント処理エラー: {e}")
+            return self.connection.send(request, data)
+        except self._connection_errors as e:
+            logger.warning("OBS WebSocketの接続が切れています。再接続します: %s", e)
+            # 共有の接続を作り直すことで、シーン管理や配信サービスも新しいクライアントを使う
+            self.connection.reconnect()
+            logger.info("OBS WebSocketに再接続しました")
+            return self.connection.send(request, data)
+    
+    def on_scene_list_changed(self, data):
+        """
+        SceneListChangedイベントのコールバック
+        
+        Args:
+            data: イベントデータ
+        """
+        # シーンの追加・削除・名前変更があったらシーンリストのキャッシュを破棄
+        self.scene_manager.invalidate_scenes()
+    
+    def on_stream_state_changed(self, data):
+        """
+        StreamStateChangedイベントのコールバック
+        
+        Args:
+            data: イベントデータ（output_active, output_stateを持つ）
+        """
+        output_active = bool(getattr(data, 'output_active', False))
+        self._last_status = (output_active, time.monotonic())
+        if output_active:
+            logger.debug("ストリーム開始イベントを検出！")
+            self.streaming_event.set()
+        else:
+            self.streaming_event.clear()
     
     def start_streaming(self) -> bool:
         """
@@ -119,36 +171,52 @@ class OBSStreamController(StreamControlInterface):
             # 既に配信中かどうかを確認
             is_streaming = self.is_streaming()
             if is_streaming:
-                print("既にOBS配信中です - 新たに開始コマンドは送信しません")
+                logger.info("既にOBS配信中です - 新たに開始コマンドは送信しません")
                 self.streaming_event.set()  # イベントをセット
                 return True
                 
             # obs-websocket v5のStartStreamコマンドを送信
-            print("配信開始リクエストを送信しました")
-            response = self.client.send("StartStream")
-            print(f"配信開始レスポンス: {response}")
-            
-            # 配信ステータスを取得して確認
-            time.sleep(2)  # 少し待ってからステータスを確認
-            status = self.is_streaming()
-            print(f"配信開始直後のステータス: {status}")
-            
-            if status:
-                self.streaming_event.set()  # イベントをセット
+            self.streaming_event.clear()
+            logger.info("配信開始リクエストを送信しました")
+            response = self._send("StartStream")
+            self._last_status = None
+            logger.debug("配信開始レスポンス: %r", response)
             
+            # 実際の開始はStreamStateChangedイベントでstreaming_eventがセットされて通知される
+            # （開始の確認はwait_for_stream_startで行うため、ここでは待機もポーリングもしない）
             return True
-        except Exception as e:
+        except self._obs_errors as e:
             error_msg = str(e)
-            print(f"配信開始エラー: {error_msg}")
+            logger.error("配信開始エラー: %s", error_msg)
             
-            # エラーメッセージが「既に配信中」を示す場合
-            if "already active" in error_msg.lower():
-                print("OBSは既に配信中です")
+            # エラーが「既に配信中」を示す場合
+            if _error_matches(e, _OUTPUT_RUNNING, _ALREADY_ACTIVE):
+                logger.info("OBSは既に配信中です")
                 self.streaming_event.set()  # イベントをセット
                 return True
                 
             return False
     
+    def build_start_request(self) -> dict:
+        """
+        配信開始のバッチ用リクエストを作成する
+        
+        送信前にprepare_startを呼び出し、配信状態をリセットしておく必要がある
+        
+        Returns:
+            dict: StartStreamのリクエスト
+        """
+        return {"requestType": "StartStream"}
+    
+    def prepare_start(self) -> None:
+        """
+        start_streamingを経由せずにStartStreamを送信する前に、配信状態をリセットする
+        
+        開始イベントの待機と配信状態の確認が、送信前の古い状態を使わないようにする
+        """
+        self.streaming_event.clear()
+        self._last_status = None
+    
     def stop_streaming(self) -> bool:
         """
         配信を停止する
@@ -156,30 +224,34 @@ class OBSStreamController(StreamControlInterface):
         Returns:
             bool: 成功した場合はTrue
         """
+        # シーン切り替えループに停止を通知
+        self._scene_switch_stop.set()
+        
         try:
             # 現在配信中かどうかを確認
             is_streaming = self.is_streaming()
             if not is_streaming:
-                print("OBSは既に配信停止しています")
+                logger.info("OBSは既に配信停止しています")
                 self.streaming_event.clear()  # イベントをクリア
                 return True
                 
             # 配信停止リクエストを送信
-            print("配信停止リクエストを送信しました")
-            self.client.send("StopStream")
-            print("配信を停止しました")
+            logger.info("配信停止リクエストを送信しました")
+            self._send("StopStream")
+            self._last_status = None
+            logger.info("配信を停止しました")
             
             # イベント状態をクリア
             self.streaming_event.clear()
             
             return True
-        except Exception as e:
+        except self._obs_errors as e:
             error_msg = str(e)
-            print(f"配信停止エラー: {error_msg}")
+            logger.error("配信停止エラー: %s", error_msg)
             
-            # エラーメッセージが「既に停止している」を示す場合
-            if "not active" in error_msg.lower():
-                print("OBSは既に配信停止しています")
+            # エラーが「既に停止している」を示す場合
+            if _error_matches(e, _OUTPUT_NOT_RUNNING, _NOT_ACTIVE):
+                logger.info("OBSは既に配信停止しています")
                 self.streaming_event.clear()
                 return True
                 
@@ -189,44 +261,66 @@ class OBSStreamController(StreamControlInterface):
         """
         現在配信中かどうかを確認する
         
+        直前の確認から短時間であれば、OBSに問い合わせずにその結果を返す。
+        配信状態が変わった場合はStreamStateChangedイベントでキャッシュが更新される
+        
         Returns:
             bool: 配信中の場合はTrue
         """
+        last_status = self._last_status
+        if last_status is not None and time.monotonic() - last_status[1] < STATUS_CACHE_TTL:
+            return last_status[0]
+        
         try:
             # obsws-pythonではGetStreamStatusの戻り値はクラスインスタンス
-            response = self.client.send("GetStreamStatus")
-            print(f"GetStreamStatus レスポンス: {response}")
-            
-            # デバッグ情報を詳細に表示
-            if hasattr(response, '__dict__'):
-                print(f"レスポンスの__dict__: {response.__dict__}")
+            response = self._send("GetStreamStatus")
             
-            # obsws-pythonでは属性名はoutput_activeを使用
-            if hasattr(response, 'output_active'):
-                streaming = response.output_active
-                print(f"output_active属性の値: {streaming}")
-                return streaming
-            elif isinstance(response, dict) and 'outputActive' in response:
-                streaming = response['outputActive']
-                print(f"outputActive属性の値: {streaming}")
+            streaming = self._extract_output_active(response)
+            if streaming is not None:
+                logger.debug("output_activeの値: %s", streaming)
+                self._last_status = (streaming, time.monotonic())
                 return streaming
             
-            # レスポンスの属性を表示
-            attrs = dir(response)
-            print(f"レスポンスの全属性: {attrs}")
+            # 想定外の形式の場合のみ、デバッグ時にレスポンスの詳細を出力する
+            # （%rは遅延評価のため、DEBUGが無効なら整形されない）
+            logger.debug("GetStreamStatus レスポンス: %r", response)
             
-            # 文字列表現に'output_active: True'が含まれているか確認
-            response_str = str(response)
-            print(f"レスポンスの文字列表現: {response_str}")
-            if "output_active: True" in response_str.lower():
-                return True
-            
-            # とにかく直接配信を試行する（最終手段）
+            # 既知の形式でなければ配信中とは判断しない
             return False
-        except Exception as e:
-            print(f"配信状態確認エラー: {str(e)}")
+        except self._obs_errors as e:
+            logger.error("配信状態確認エラー: %s", e)
             return False
     
+    def _extract_output_active(self, response):
+        """
+        GetStreamStatusのレスポンスから配信中かどうかを取り出す
+        
+        レスポンス形式はプロセス中で変わらないため、初回のみ形式を判定し、以降は判定済みの取り出し方を使う
+        
+        Args:
+            response: GetStreamStatusのレスポンス
+            
+        Returns:
+            bool or None: 配信中かどうか、または既知の形式でない場合はNone
+        """
+        accessor = self._status_accessor
+        if accessor is not None:
+            try:
+                return bool(accessor(response))
+            except (AttributeError, KeyError, TypeError):
+                self._status_accessor = None
+        
+        # obsws-pythonでは属性名はoutput_activeを使用
+        if hasattr(response, 'output_active'):
+            accessor = operator.attrgetter('output_active')
+        elif isinstance(response, dict) and 'outputActive' in response:
+            accessor = operator.itemgetter('outputActive')
+        else:
+            return None
+        
+        self._status_accessor = accessor
+        return bool(accessor(response))
+    
     def wait_for_stream_start(self, timeout: int = 60) -> bool:
         """
         配信が実際に開始されるまで待機する
@@ -237,33 +331,22 @@ class OBSStreamController(StreamControlInterface):
         Returns:
             bool: 配信が開始された場合はTrue、タイムアウトした場合はFalse
         """
-        print(f"配信開始を待機中...（最大{timeout}秒）")
+        logger.info("配信開始を待機中...（最大%s秒）", timeout)
         
-        # すでに配信中なら即時True
-        if self.is_streaming():
-            print("すでに配信中です")
-            return True
-            
-        # イベント待機
+        # StreamStateChangedイベントを待機（既に配信中であればイベントはセット済み）
         started = self.streaming_event.wait(timeout)
         if started:
-            print("配信開始を確認しました")
+            logger.info("配信開始を確認しました")
             return True
         
         # イベントでの確認に失敗した場合、直接ステータスを取得して再確認
-        print("イベントでの配信開始確認タイムアウト - 直接ステータスを確認します")
-        try:
-            # 直接OBSにストリーミング状態を問い合わせ
-            is_active = self.is_streaming()
-            if is_active:
-                print("直接確認: 配信は開始されています")
-                return True
-            else:
-                print("直接確認: 配信は開始されていません")
-                return False
-        except Exception as e:
-            print(f"配信状態確認エラー: {e}")
-            return False
+        logger.warning("イベントでの配信開始確認タイムアウト - 直接ステータスを確認します")
+        # 直接OBSにストリーミング状態を問い合わせ（is_streamingはエラー時にFalseを返す）
+        if self.is_streaming():
+            logger.info("直接確認: 配信は開始されています")
+            return True
+        logger.info("直接確認: 配信は開始されていません")
+        return False
             
     def auto_stream_with_scene_switch(self, duration: int, scenes: list, interval: int):
         """
@@ -275,35 +358,91 @@ class OBSStreamController(StreamControlInterface):
             interval (int): シーンを切り替える間隔（秒）
         """
         # 配信開始
+        self._scene_switch_stop.clear()
         self.start_streaming()
         
         # 配信が実際に開始されるまで待機
         if not self.wait_for_stream_start(timeout=60):
-            print("配信開始タイムアウト: 60秒以内に配信が開始されませんでした")
+            logger.error("配信開始タイムアウト: 60秒以内に配信が開始されませんでした")
             self.stop_streaming()
             return
         
-        print(f"配信が開始されました。{duration}秒間の配信を行います")
-        start_time = time.time()
+        # シーンの存在確認とリクエスト内容の作成はループの前に一度だけ行う
+        available = set(self.scene_manager.get_scenes())
+        if available:
+            valid_scenes = [scene for scene in scenes if scene in available]
+            skipped = [scene for scene in scenes if scene not in available]
+            if skipped:
+                logger.warning("存在しないシーンをスキップします: %s", skipped)
+        else:
+            # シーンリストを取得できなかった場合は存在を判断できないため、すべて切り替え対象とし、
+            # 存在しないシーンは切り替え時のエラーとして記録する
+            logger.warning("シーンリストを取得できませんでした。指定されたシーンをすべて切り替えます")
+            valid_scenes = list(scenes)
+        payloads = [{"sceneName": scene} for scene in valid_scenes]
+        
+        logger.info("配信が開始されました。%s秒間の配信を行います", duration)
+        # 壁時計の変更に影響されないよう、終了時刻はmonotonicで管理する
+        next_switch = time.monotonic()
+        deadline = next_switch + duration
         
         try:
-            while time.time() - start_time < duration:
-                for scene in scenes:
-                    if time.time() - start_time >= duration:
-                        break
-                    self.scene_manager.switch_to_scene(scene)
-                    time.sleep(interval)
+            if not payloads:
+                # 切り替えるシーンがなければ、シーンを変えずに配信時間だけ待つ
+                logger.warning("切り替え可能なシーンがありません")
+                self._scene_switch_stop.wait(duration)
+                return
+            for payload in itertools.cycle(payloads):
+                if time.monotonic() >= deadline:
+                    break
+                try:
+                    self._send("SetCurrentProgramScene", payload)
+                except self._obs_errors as e:
+                    logger.error("シーン切り替えエラー: %s", e)
+                # 切り替え時刻は開始時刻からの固定間隔で決め、切り替えの往復時間は待機時間に含める
+                next_switch += interval
+                wait_time = max(0.0, min(next_switch, deadline) - time.monotonic())
+                # 停止が要求されたら待機を中断して終了する
+                if self._scene_switch_stop.wait(wait_time):
+                    return
         except KeyboardInterrupt:
-            print("ユーザーによって配信が中断されました")
+            logger.info("ユーザーによって配信が中断されました")
         finally:
             self.stop_streaming()
-            
-    def __del__(self):
-        """デストラクタ：イベントクライアントを解放"""
-        try:
-            if hasattr(self, 'event_client') and self.event_client:
-                # obsws-pythonのEventClientにはstopメソッドがないので、リファレンスを解放
-                print("OBS WebSocketイベントリスナーをクリア")
-                self.event_client = None
-        except Exception as e:
-            print(f"イベントリスナー解放エラー: {str(e)}") 
\ No newline at end of file
+    
+    def close(self) -> None:
+        """
+        イベントハンドラの登録を解除する
+        
+        イベントクライアントは他のコントローラーと共有されるため、
+        ハンドラが1つも残っていない場合のみ接続を閉じる
+        """
+        event_client = self.event_client
+        if event_client is None:
+            return
+        self.event_client = None
+        
+        event_client.callback.deregister([
+            self.on_stream_state_changed,
+            self.on_scene_list_changed,
+        ])
+        if event_client.callback.get():
+            return
+        
+        for key, client in list(_event_clients.items()):
+            if client is event_client:
+                del _event_clients[key]
+        disconnect = getattr(event_client, 'disconnect', None)
+        if disconnect is not None:
+            disconnect()
+        else:
+            event_client.base_client.ws.close()
+        logger.debug("OBS WebSocketイベントリスナーを終了しました")
+    
+    def __enter__(self):
+        """コンテキストマネージャーとして使用する"""
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """コンテキスト終了時にイベントハンドラを解除する"""
+        self.close()
@@ -3,21 +3,26 @@ YouTubeクライアントのアダプター
 """
 from typing import Dict, Any, Tuple, Optional
 from src.domain.interfaces.youtube_interface import YouTubeLiveInterface
-from src.infrastructure.youtube.youtube_client import YouTubeLiveController
 
 class YouTubeLiveAdapter(YouTubeLiveInterface):
     """
     YouTubeLiveControllerをYouTubeLiveInterfaceに適合させるアダプタークラス
     """
     
-    def __init__(self, client_secrets_file: str):
+    def __init__(self, client_secrets_file: str, interactive: Optional[bool] = None,
+                 auto_proceed: bool = False):
         """
         YouTubeLiveAdapterを初期化する
         
         Args:
             client_secrets_file (str): OAuthクライアントシークレットのJSONファイルパス
+            interactive (bool, optional): 手動操作の入力待ちを行うかどうか（省略時は標準入力が端末かどうかで判定）
+            auto_proceed (bool): ライブへの移行に失敗した場合も確認せずに待機を続けるかどうか
         """
-        self.youtube_client = YouTubeLiveController(client_secrets_file)
+        # Google APIクライアントの読み込みは重いため、実際に使う時まで遅らせる
+        from src.infrastructure.youtube.youtube_client import YouTubeLiveController
+        self.youtube_client = YouTubeLiveController(
+            client_secrets_file, interactive=interactive, auto_proceed=auto_proceed)
     
     def create_broadcast(self, title: str, description: str, privacy_status: str, start_time=None) -> Dict[str, Any]:
         """
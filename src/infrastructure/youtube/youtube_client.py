@@ -2,8 +2,12 @@
 YouTube Live APIを使って配信を制御するモジュール
 """
 import os
-import json
+import sys
+import functools
+import logging
 import datetime
+import httplib2
+import google_auth_httplib2
 import googleapiclient.discovery
 import googleapiclient.errors
 from google_auth_oauthlib.flow import InstalledAppFlow
@@ -11,25 +15,94 @@ from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
 import time
 
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    import json
+    _loads = json.loads
+
+logger = logging.getLogger(__name__)
+
+# API呼び出しで発生しうるエラー（HTTPエラーと通信エラー）
+API_ERRORS = (googleapiclient.errors.HttpError, httplib2.HttpLib2Error, OSError)
+
+# YouTube APIに渡す日時の形式（UTC）
+ISO_UTC_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+# リクエスト本文の固定部分（変更せずに共有する）
+_STREAM_CDN = {
+    "frameRate": "variable",
+    "ingestionType": "rtmp",
+    "resolution": "variable"
+}
+_BROADCAST_CONTENT_DETAILS = {
+    "enableAutoStart": True,
+    "enableAutoStop": True
+}
+
+@functools.lru_cache(maxsize=4)
+def _build_youtube(credentials):
+    """
+    認証情報からYouTube APIリソースを構築する（認証情報ごとに結果をキャッシュ）
+    
+    認証情報の更新はオブジェクト自体が書き換わるため、構築済みのリソースをそのまま使い続けられる
+    
+    Args:
+        credentials (Credentials): 認証情報
+        
+    Returns:
+        googleapiclient.discovery.Resource: YouTube APIリソース
+    """
+    # 同梱のディスカバリー文書を使い（ネットワーク取得なし）、
+    # 1つのHTTPオブジェクトを全リクエストで共有して接続を使い回す
+    http = google_auth_httplib2.AuthorizedHttp(credentials, http=httplib2.Http())
+    return googleapiclient.discovery.build(
+        "youtube", "v3", http=http, cache_discovery=False, static_discovery=True)
+
 class YouTubeLiveController:
     """YouTubeのライブ配信を制御するクラス"""
     
     # YouTube Data API v3で必要なスコープ
     SCOPES = ["https://www.googleapis.com/auth/youtube"]
     
-    def __init__(self, client_secrets_file, token_file="token.json"):
+    # 有効期限までの残り時間がこれを下回ったらトークンを更新する
+    REFRESH_MARGIN = datetime.timedelta(minutes=5)
+    
+    # 一時的なエラー（5xx、429、rateLimitExceeded）時の再試行回数
+    # googleapiclientがジッター付きの指数バックオフで再試行する。
+    # サーバー側で処理済みの要求を再送すると重複作成や冗長な状態遷移になるため、
+    # insertとtransitionには適用せず、冪等な取得・関連付けのみで使う
+    NUM_RETRIES = 4
+    
+    # liveBroadcasts.listで1回に取得できる最大件数
+    MAX_PAGE_SIZE = 50
+    
+    # ブロードキャスト状態キャッシュの有効期間（秒）
+    STATUS_CACHE_TTL = 1.0
+    
+    # トークンファイルごとの認証情報（プロセス内で使い回す）
+    _credentials_cache = {}
+    
+    def __init__(self, client_secrets_file, token_file="token.json", interactive=None, auto_proceed=False):
         """
         YouTubeLiveControllerを初期化する
         
         Args:
             client_secrets_file (str): OAuth 2.0クライアントシークレットのJSONファイルパス
             token_file (str): 認証トークンの保存先
+            interactive (bool, optional): 手動操作の入力待ちを行うかどうか（省略時は標準入力が端末かどうかで判定）
+            auto_proceed (bool): ライブへの移行に失敗した場合も確認せずに待機を続けるかどうか
         """
         self.client_secrets_file = client_secrets_file
         self.token_file = token_file
+        self.interactive = sys.stdin.isatty() if interactive is None else interactive
+        self.auto_proceed = auto_proceed
         self.youtube = self._authenticate()
         self.current_broadcast_id = None
         self.current_stream_id = None
+        # ブロードキャストIDごとの状態キャッシュ (取得時刻, 状態)
+        self._status_cache = {}
         
     def _authenticate(self):
         """
@@ -38,29 +111,48 @@ class YouTubeLiveController:
         Returns:
             googleapiclient.discovery.Resource: YouTube APIリソース
         """
-        credentials = None
+        credentials = self._credentials_cache.get(self.token_file)
         
-        # 保存済みのトークンがあればロード
-        if os.path.exists(self.token_file):
-            credentials = Credentials.from_authorized_user_info(
-                json.load(open(self.token_file, 'r')), self.SCOPES)
+        # キャッシュになければ保存済みのトークンをロード
+        if credentials is None and os.path.exists(self.token_file):
+            with open(self.token_file, 'rb') as token:
+                credentials = Credentials.from_authorized_user_info(_loads(token.read()), self.SCOPES)
         
-        # トークンが無いか有効期限切れなら認証フローを実行
-        if not credentials or not credentials.valid:
-            if credentials and credentials.expired and credentials.refresh_token:
+        # トークンが無いか有効期限切れ（間近）なら更新または認証フローを実行
+        if not credentials or self._needs_refresh(credentials):
+            if credentials and credentials.refresh_token:
                 credentials.refresh(Request())
             else:
                 flow = InstalledAppFlow.from_client_secrets_file(
                     self.client_secrets_file, self.SCOPES)
                 credentials = flow.run_local_server(port=0)
             
-            # トークンを保存
+            # 更新された場合のみトークンを保存
             with open(self.token_file, 'w') as token:
                 token.write(credentials.to_json())
         
-        # YouTube API clientを構築
-        return googleapiclient.discovery.build(
-            "youtube", "v3", credentials=credentials)
+        self._credentials_cache[self.token_file] = credentials
+        
+        # YouTube API clientを構築（同じ認証情報に対しては構築済みのものを使い回す）
+        return _build_youtube(credentials)
+    
+    def _needs_refresh(self, credentials):
+        """
+        認証情報の更新が必要かどうかを判定する
+        
+        Args:
+            credentials (Credentials): 認証情報
+            
+        Returns:
+            bool: 無効、または有効期限まで残りわずかの場合はTrue
+        """
+        if not credentials.valid:
+            return True
+        if credentials.expiry is None:
+            return False
+        # google-authのexpiryはタイムゾーン情報なしのUTC
+        now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        return credentials.expiry - now < self.REFRESH_MARGIN
     
     def create_broadcast(self, title, description="", start_time=None, privacy_status="public"):
         """
@@ -76,56 +168,59 @@ class YouTubeLiveController:
         Returns:
             dict: 作成されたブロードキャスト情報
         """
+        try:
+            response = self._broadcast_insert_request(
+                title, description, start_time, privacy_status).execute()
+            self.current_broadcast_id = response["id"]
+            logger.info("ブロードキャストを作成しました: ID = %s", self.current_broadcast_id)
+            return response
+        except API_ERRORS as e:
+            logger.error("ブロードキャスト作成エラー: %s", e)
+            return None
+    
+    def _broadcast_insert_request(self, title, description, start_time, privacy_status):
+        """
+        ブロードキャスト作成リクエストを組み立てる（実行はしない）
+        
+        Args:
+            title (str): 配信タイトル
+            description (str): 配信の説明
+            start_time (datetime or str): 配信開始予定時刻 (Noneの場合は現在時刻から5分後)
+            privacy_status (str): プライバシー設定
+            
+        Returns:
+            googleapiclient.http.HttpRequest: liveBroadcasts.insertのリクエスト
+        """
         # デフォルトの開始時刻を現在から5分後に設定（余裕を持たせる）
         if start_time is None:
             start_time = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(minutes=5)
         
-        # start_timeの型を確認し、適切に処理
+        # 文字列の場合はそのまま使用（すでにISO形式と仮定）
         if isinstance(start_time, str):
-            # 文字列の場合はそのまま使用（すでにISO形式と仮定）
             start_time_iso = start_time
         else:
-            # datetime型の場合はISO形式に変換、UTCタイムゾーン付きで確実に
+            # タイムゾーン情報がない場合はUTCとみなし、UTCの'Z'付きISO形式に変換
             if start_time.tzinfo is None:
-                # タイムゾーン情報がない場合はUTCを設定
                 start_time = start_time.replace(tzinfo=datetime.timezone.utc)
-            start_time_iso = start_time.isoformat()
-            
-            # ISO形式の末尾に'Z'がない場合は追加（UTCを明示）
-            if not start_time_iso.endswith('Z'):
-                start_time_iso = start_time_iso.replace('+00:00', 'Z')
-                if not start_time_iso.endswith('Z'):
-                    start_time_iso += 'Z'
+            start_time_iso = start_time.astimezone(datetime.timezone.utc).strftime(ISO_UTC_FORMAT)
         
-        print(f"設定する配信開始時刻: {start_time_iso}")
+        logger.info("設定する配信開始時刻: %s", start_time_iso)
         
         # ブロードキャストの作成リクエスト
-        try:
-            request = self.youtube.liveBroadcasts().insert(
-                part="snippet,status,contentDetails",
-                body={
-                    "snippet": {
-                        "title": title,
-                        "description": description,
-                        "scheduledStartTime": start_time_iso
-                    },
-                    "status": {
-                        "privacyStatus": privacy_status
-                    },
-                    "contentDetails": {
-                        "enableAutoStart": True,
-                        "enableAutoStop": True
-                    }
-                }
-            )
-            
-            response = request.execute()
-            self.current_broadcast_id = response["id"]
-            print(f"ブロードキャストを作成しました: ID = {self.current_broadcast_id}")
-            return response
-        except Exception as e:
-            print(f"ブロードキャスト作成エラー: {e}")
-            return None
+        return self.youtube.liveBroadcasts().insert(
+            part="snippet,status,contentDetails",
+            body={
+                "snippet": {
+                    "title": title,
+                    "description": description,
+                    "scheduledStartTime": start_time_iso
+                },
+                "status": {
+                    "privacyStatus": privacy_status
+                },
+                "contentDetails": _BROADCAST_CONTENT_DETAILS
+            }
+        )
     
     def create_stream(self, title="Primary Stream", description=""):
         """
@@ -138,29 +233,48 @@ class YouTubeLiveController:
         Returns:
             str: ストリームID
         """
-        request = self.youtube.liveStreams().insert(
+        response = self._stream_insert_request(title, description).execute()
+        return self._on_stream_created(response)
+    
+    def _stream_insert_request(self, title, description):
+        """
+        ストリーム作成リクエストを組み立てる（実行はしない）
+        
+        Args:
+            title (str): ストリームタイトル
+            description (str): ストリームの説明
+            
+        Returns:
+            googleapiclient.http.HttpRequest: liveStreams.insertのリクエスト
+        """
+        return self.youtube.liveStreams().insert(
             part="snippet,cdn",
             body={
                 "snippet": {
                     "title": title,
                     "description": description
                 },
-                "cdn": {
-                    "frameRate": "variable",
-                    "ingestionType": "rtmp",
-                    "resolution": "variable"
-                }
+                "cdn": _STREAM_CDN
             }
         )
+    
+    def _on_stream_created(self, response):
+        """
+        ストリーム作成のレスポンスからIDと接続情報を取り出す
         
-        response = request.execute()
+        Args:
+            response (dict): liveStreams.insertのレスポンス
+            
+        Returns:
+            tuple: (ストリームID, RTMP URL, ストリームキー)
+        """
         self.current_stream_id = response["id"]
         rtmp_url = response["cdn"]["ingestionInfo"]["ingestionAddress"]
         stream_key = response["cdn"]["ingestionInfo"]["streamName"]
         
-        print(f"ストリームを作成しました: ID = {self.current_stream_id}")
-        print(f"RTMP URL: {rtmp_url}")
-        print(f"ストリームキー: {stream_key} (このキーをOBSに設定してください)")
+        logger.info("ストリームを作成しました: ID = %s", self.current_stream_id)
+        logger.info("RTMP URL: %s", rtmp_url)
+        logger.info("ストリームキー: %s (このキーをOBSに設定してください)", stream_key)
         
         return self.current_stream_id, rtmp_url, stream_key
     
@@ -179,17 +293,19 @@ class YouTubeLiveController:
         stream_id = stream_id or self.current_stream_id
         
         if not broadcast_id or not stream_id:
-            print("ブロードキャストまたはストリームIDが指定されていません")
+            logger.error("ブロードキャストまたはストリームIDが指定されていません")
             return False
         
+        # レスポンスの内容は使わないため、取得するパートはIDのみにする
         request = self.youtube.liveBroadcasts().bind(
-            part="id,contentDetails",
+            part="id",
             id=broadcast_id,
             streamId=stream_id
         )
         
-        response = request.execute()
-        print(f"ブロードキャストとストリームを関連付けました")
+        response = request.execute(num_retries=self.NUM_RETRIES)
+        self._status_cache.pop(broadcast_id, None)
+        logger.info("ブロードキャストとストリームを関連付けました")
         return True
     
     def start_broadcast(self, broadcast_id=None):
@@ -205,52 +321,28 @@ class YouTubeLiveController:
         broadcast_id = broadcast_id or self.current_broadcast_id
         
         if not broadcast_id:
-            print("ブロードキャストIDが指定されていません")
+            logger.error("ブロードキャストIDが指定されていません")
             return False
         
         try:
             # 現在の状態を確認
             current_status = self.get_broadcast_status(broadcast_id)
-            print(f"ブロードキャスト現在の状態: {current_status}")
+            logger.info("ブロードキャスト現在の状態: %s", current_status)
             
             # 既にライブ状態の場合は成功とみなす
             if current_status == "live":
-                print("ブロードキャストは既にライブ状態です")
+                logger.info("ブロードキャストは既にライブ状態です")
                 return True
                 
             # 「ready」または「testing」状態の場合、少し待機して再度確認
             if current_status in ["ready", "testing"]:
-                print("OBSからのストリームデータがYouTubeに到達するのを待機中...")
-                for i in range(3):
-                    time.sleep(3)  # 3秒待機
-                    updated_status = self.get_broadcast_status(broadcast_id)
-                    print(f"更新されたブロードキャスト状態: {updated_status}")
-                    if updated_status == "live":
-                        print("ブロードキャストは自動的にライブ状態になりました")
-                        return True
-            
-            # 「ready」や「testing」状態からライブに移行できない場合、移行方法を変更
-            if current_status in ["ready", "testing"]:
-                print("YouTube APIを使用してブロードキャストをライブ状態に移行します...")
-                
-                # 代替方法：bindブロードキャストを再実行して強制的に進める
-                try:
-                    # このタイミングでブロードキャストとストリームを再関連付け
-                    self.bind_broadcast_to_stream(broadcast_id, self.current_stream_id)
-                    print("ブロードキャストとストリームを再関連付けしました")
-                    
-                    # 少し待機してから再度状態を確認
-                    time.sleep(5)
-                    updated_status = self.get_broadcast_status(broadcast_id)
-                    print(f"再関連付け後のブロードキャスト状態: {updated_status}")
-                    
-                    if updated_status == "live":
-                        print("ブロードキャストがライブ状態になりました")
-                        return True
-                except:
-                    pass
+                logger.info("OBSからのストリームデータがYouTubeに到達するのを待機中...")
+                if self._poll_until(lambda: self._status_is(broadcast_id, "live"), total_timeout=9.0):
+                    logger.info("ブロードキャストは自動的にライブ状態になりました")
+                    return True
             
-            # それでも「live」状態にならない場合、標準の方法でトランジション
+            # 自動でライブ状態にならない場合、トランジションで移行する
+            # （再送するとredundantTransitionになりうるため、execute内での再試行は行わない）
             try:
                 request = self.youtube.liveBroadcasts().transition(
                     broadcastStatus="live",
@@ -259,51 +351,94 @@ class YouTubeLiveController:
                 )
                 
                 response = request.execute()
+                self._status_cache.pop(broadcast_id, None)
                 status = response['status']['lifeCycleStatus']
-                print(f"ブロードキャスト状態変更: {status}")
+                logger.info("ブロードキャスト状態変更: %s", status)
                 return status == 'live'
             except googleapiclient.errors.HttpError as e:
                 error_reason = str(e)
                 
                 # エラー理由を詳細に分析
                 if 'redundantTransition' in error_reason:
-                    print("冗長な状態遷移: ブロードキャストは既にライブ状態です")
+                    logger.info("冗長な状態遷移: ブロードキャストは既にライブ状態です")
                     return True
                 elif 'invalidTransition' in error_reason:
                     # 特別なケース: OBSからのストリームがまだYouTubeに到達していない可能性
-                    print(f"無効な状態遷移: 現在の状態 '{current_status}' からライブに移行できません")
-                    print("OBSからのストリームデータが十分にYouTubeに送信されるのを待機しています...")
+                    logger.warning("無効な状態遷移: 現在の状態 '%s' からライブに移行できません", current_status)
+                    logger.warning("OBSからのストリームデータが十分にYouTubeに送信されるのを待機しています...")
                     
                     # ユーザーに手動での確認を促す
-                    print("YouTubeスタジオでブロードキャスト状態を確認して、")
-                    print("ストリーム状態が「良好」になったら手動でライブ開始することをお勧めします。")
-                    print("YouTube Studio URL: https://studio.youtube.com/channel/live")
+                    logger.info("YouTubeスタジオでブロードキャスト状態を確認して、")
+                    logger.info("ストリーム状態が「良好」になったら手動でライブ開始することをお勧めします。")
+                    logger.info("YouTube Studio URL: https://studio.youtube.com/channel/live")
                     
-                    proceed = input("自動配信を続行せずにYouTubeスタジオでライブ開始しますか？ (y/n): ")
-                    if proceed.lower() == 'y':
-                        print("ライブ状態への移行をユーザーが手動で行うことを選択しました")
-                        return True
+                    # 端末がない場合や自動続行が設定されている場合は確認せずに待機を続ける
+                    if self.interactive and not self.auto_proceed:
+                        proceed = input("自動配信を続行せずにYouTubeスタジオでライブ開始しますか？ (y/n): ")
+                        if proceed.lower() == 'y':
+                            logger.info("ライブ状態への移行をユーザーが手動で行うことを選択しました")
+                            return True
                     
                     # 少し待機してから再度確認
-                    print("もう少し待機して再度確認します...")
-                    time.sleep(10)
-                    final_status = self.get_broadcast_status(broadcast_id)
-                    print(f"最終確認ブロードキャスト状態: {final_status}")
-                    
-                    if final_status == "live":
-                        print("ブロードキャストがライブ状態になりました")
+                    logger.info("もう少し待機して再度確認します...")
+                    if self._poll_until(lambda: self._status_is(broadcast_id, "live"), total_timeout=10.0):
+                        logger.info("ブロードキャストがライブ状態になりました")
                         return True
                     
                     # それでも失敗する場合
                     return False
                 else:
-                    print(f"ライブ配信開始エラー: {str(e)}")
-                    print("YouTubeエラーの詳細: " + error_reason[:200])
+                    logger.error("ライブ配信開始エラー: %s", e)
+                    logger.error("YouTubeエラーの詳細: %s", error_reason[:200])
                     return False
-        except Exception as e:
-            print(f"ライブ配信開始エラー: {str(e)}")
+        except API_ERRORS as e:
+            logger.error("ライブ配信開始エラー: %s", e)
             return False
     
+    @staticmethod
+    def _poll_until(predicate, initial=0.5, factor=2.0, cap=16.0, total_timeout=60.0):
+        """
+        条件が満たされるまで指数バックオフで間隔を広げながら確認を繰り返す
+        
+        呼び出し側は直前に状態を取得しているため、最初の確認も待機の後に行う
+        
+        Args:
+            predicate (callable): 条件を満たした場合にTrueを返す関数
+            initial (float): 最初の待機時間（秒）
+            factor (float): 待機時間の増加倍率
+            cap (float): 1回あたりの待機時間の上限（秒）
+            total_timeout (float): 全体の待機時間の上限（秒）
+            
+        Returns:
+            bool: 時間内に条件が満たされた場合はTrue
+        """
+        deadline = time.monotonic() + total_timeout
+        delay = initial
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(delay, cap, remaining))
+            delay *= factor
+            if predicate():
+                return True
+    
+    def _status_is(self, broadcast_id, expected):
+        """
+        ブロードキャストの状態を取得し、期待した状態かどうかを返す
+        
+        Args:
+            broadcast_id (str): ブロードキャストID
+            expected (str): 期待する状態
+            
+        Returns:
+            bool: 期待した状態の場合はTrue
+        """
+        # ポーリングの間隔はキャッシュの有効期間より短いため、キャッシュを使わずに問い合わせる
+        status = self.get_broadcast_status(broadcast_id, use_cache=False)
+        logger.debug("更新されたブロードキャスト状態: %s", status)
+        return status == expected
+    
     def end_broadcast(self, broadcast_id=None):
         """
         ブロードキャストを終了する (ライブ配信終了)
@@ -317,7 +452,7 @@ class YouTubeLiveController:
         broadcast_id = broadcast_id or self.current_broadcast_id
         
         if not broadcast_id:
-            print("ブロードキャストIDが指定されていません")
+            logger.error("ブロードキャストIDが指定されていません")
             return False
         
         request = self.youtube.liveBroadcasts().transition(
@@ -327,7 +462,8 @@ class YouTubeLiveController:
         )
         
         response = request.execute()
-        print(f"ライブ配信を終了しました: {response['status']['lifeCycleStatus']}")
+        self._status_cache.pop(broadcast_id, None)
+        logger.info("ライブ配信を終了しました: %s", response['status']['lifeCycleStatus'])
         return response['status']['lifeCycleStatus'] == 'complete'
     
     def list_broadcasts(self, max_results=5, broadcast_status="all"):
@@ -341,34 +477,42 @@ class YouTubeLiveController:
         Returns:
             list: ブロードキャスト情報のリスト
         """
-        request = self.youtube.liveBroadcasts().list(
-            part="id,snippet,contentDetails,status",
+        broadcasts = []
+        broadcasts_api = self.youtube.liveBroadcasts()
+        # 一覧に使うフィールドだけを取得する（ページ送り用のnextPageTokenを含む）
+        request = broadcasts_api.list(
+            part="id,snippet,status",
             broadcastStatus=broadcast_status,
-            maxResults=max_results
+            maxResults=min(max_results, self.MAX_PAGE_SIZE),
+            fields="nextPageToken,items(id,snippet(title,description,scheduledStartTime),"
+                   "status(lifeCycleStatus,privacyStatus))"
         )
         
-        response = request.execute()
-        broadcasts = []
-        
-        for item in response.get("items", []):
-            broadcast_info = {
-                "id": item["id"],
-                "title": item["snippet"]["title"],
-                "description": item["snippet"]["description"],
-                "status": item["status"]["lifeCycleStatus"],
-                "privacy": item["status"]["privacyStatus"],
-                "scheduledStartTime": item["snippet"].get("scheduledStartTime")
-            }
-            broadcasts.append(broadcast_info)
+        # 1ページの上限を超える件数はnextPageTokenをたどって取得する
+        # （ページトークンは前のページの応答でしか得られないため順番に取得する）
+        while request is not None and len(broadcasts) < max_results:
+            response = request.execute(num_retries=self.NUM_RETRIES)
+            for item in response.get("items", []):
+                broadcast_info = {
+                    "id": item["id"],
+                    "title": item["snippet"]["title"],
+                    "description": item["snippet"]["description"],
+                    "status": item["status"]["lifeCycleStatus"],
+                    "privacy": item["status"]["privacyStatus"],
+                    "scheduledStartTime": item["snippet"].get("scheduledStartTime")
+                }
+                broadcasts.append(broadcast_info)
+            request = broadcasts_api.list_next(request, response)
         
-        return broadcasts
+        return broadcasts[:max_results]
     
-    def get_broadcast_status(self, broadcast_id=None):
+    def get_broadcast_status(self, broadcast_id=None, use_cache=True):
         """
         ブロードキャストの現在のステータスを取得
         
         Args:
             broadcast_id (str): ブロードキャストID (Noneの場合は最後に作成したもの)
+            use_cache (bool): Falseの場合はキャッシュを使わずに必ず問い合わせる
             
         Returns:
             str: ステータス文字列 ('created', 'ready', 'testing', 'live', 'complete' など)
@@ -376,19 +520,27 @@ class YouTubeLiveController:
         broadcast_id = broadcast_id or self.current_broadcast_id
         
         if not broadcast_id:
-            print("ブロードキャストIDが指定されていません")
+            logger.error("ブロードキャストIDが指定されていません")
             return None
         
+        # 短時間に繰り返し問い合わせる場合はキャッシュを返す
+        cached = self._status_cache.get(broadcast_id) if use_cache else None
+        if cached is not None and time.monotonic() - cached[0] < self.STATUS_CACHE_TTL:
+            return cached[1]
+        
         request = self.youtube.liveBroadcasts().list(
             part="status",
-            id=broadcast_id
+            id=broadcast_id,
+            fields="items/status/lifeCycleStatus"
         )
         
-        response = request.execute()
+        response = request.execute(num_retries=self.NUM_RETRIES)
         if not response.get("items"):
             return None
         
-        return response["items"][0]["status"]["lifeCycleStatus"]
+        status = response["items"][0]["status"]["lifeCycleStatus"]
+        self._status_cache[broadcast_id] = (time.monotonic(), status)
+        return status
     
     def is_broadcast_live(self, broadcast_id=None):
         """
@@ -403,8 +555,8 @@ class YouTubeLiveController:
         try:
             status = self.get_broadcast_status(broadcast_id)
             return status == "live"
-        except Exception as e:
-            print(f"ブロードキャスト状態チェックエラー: {str(e)}")
+        except API_ERRORS as e:
+            logger.error("ブロードキャスト状態チェックエラー: %s", e)
             return False
     
     def get_broadcast_url(self, broadcast_id=None):
@@ -420,7 +572,7 @@ class YouTubeLiveController:
         broadcast_id = broadcast_id or self.current_broadcast_id
         
         if not broadcast_id:
-            print("ブロードキャストIDが指定されていません")
+            logger.error("ブロードキャストIDが指定されていません")
             return None
             
         return f"https://www.youtube.com/watch?v={broadcast_id}"
@@ -437,11 +589,34 @@ class YouTubeLiveController:
         Returns:
             tuple: (ブロードキャストID, ストリームキー)
         """
-        # 1. ブロードキャスト(動画メタデータ)作成
-        broadcast_id = self.create_broadcast(title, description, privacy_status=privacy_status)
-        
-        # 2. ストリーム(技術設定)作成
-        stream_id, rtmp_url, stream_key = self.create_stream(title + " - Stream")
+        # 1. ブロードキャスト(動画メタデータ)と 2. ストリーム(技術設定)の作成は
+        #    互いに独立しているため、バッチリクエストで1回の往復にまとめる
+        # コールバック内で例外を送出すると残りの応答が処理されないため、結果と例外をまとめて受け取る
+        results = {}
+        
+        def on_response(request_id, response, exception):
+            results[request_id] = (response, exception)
+        
+        batch = self.youtube.new_batch_http_request(callback=on_response)
+        batch.add(self._broadcast_insert_request(title, description, None, privacy_status),
+                  request_id="broadcast")
+        batch.add(self._stream_insert_request(title + " - Stream", ""), request_id="stream")
+        batch.execute()
+        
+        failures = {request_id: exception for request_id, (_, exception) in results.items()
+                    if exception is not None}
+        if failures:
+            # 片方だけ作成された場合は、使われずに残らないよう作成済みのリソースを削除する
+            for request_id, (response, exception) in results.items():
+                if exception is None:
+                    self._delete_orphan(request_id, response["id"])
+            details = ", ".join(f"{request_id}: {exception}" for request_id, exception in failures.items())
+            raise RuntimeError(f"ライブ配信の作成に失敗しました ({details})") from next(iter(failures.values()))
+        
+        broadcast_id = results["broadcast"][0]["id"]
+        self.current_broadcast_id = broadcast_id
+        logger.info("ブロードキャストを作成しました: ID = %s", broadcast_id)
+        stream_id, rtmp_url, stream_key = self._on_stream_created(results["stream"][0])
         
         # 3. ブロードキャストとストリームの関連付け
         self.bind_broadcast_to_stream(broadcast_id, stream_id)
@@ -449,16 +624,31 @@ class YouTubeLiveController:
         # 配信URLを生成
         broadcast_url = self.get_broadcast_url(broadcast_id)
         
-        print(f"ライブ配信の設定が完了しました")
-        print(f"タイトル: {title}")
-        print(f"配信URL: {broadcast_url}")
-        print(f"OBSに以下の情報を設定してください:")
-        print(f"URLとストリームキーをOBSの設定→配信→サービス「カスタム」に設定")
-        print(f"サーバー: {rtmp_url}")
-        print(f"ストリームキー: {stream_key}")
+        logger.info("ライブ配信の設定が完了しました")
+        logger.info("タイトル: %s", title)
+        logger.info("配信URL: %s", broadcast_url)
+        logger.info("OBSに以下の情報を設定してください:")
+        logger.info("URLとストリームキーをOBSの設定→配信→サービス「カスタム」に設定")
+        logger.info("サーバー: %s", rtmp_url)
+        logger.info("ストリームキー: %s", stream_key)
         
         return broadcast_id, stream_key
     
+    def _delete_orphan(self, request_id, resource_id):
+        """
+        バッチで片方だけ作成されたブロードキャストまたはストリームを削除する
+        
+        Args:
+            request_id (str): バッチ内のリクエストID（"broadcast"または"stream"）
+            resource_id (str): 作成されたリソースのID
+        """
+        resource = self.youtube.liveBroadcasts() if request_id == "broadcast" else self.youtube.liveStreams()
+        try:
+            resource.delete(id=resource_id).execute()
+            logger.warning("使われない%sを削除しました: ID = %s", request_id, resource_id)
+        except API_ERRORS as e:
+            logger.error("使われない%sを削除できませんでした (ID = %s): %s", request_id, resource_id, e)
+    
     def get_broadcast_info(self, broadcast_id=None):
         """
         ブロードキャストの詳細情報を取得
@@ -472,7 +662,7 @@ class YouTubeLiveController:
         broadcast_id = broadcast_id or self.current_broadcast_id
         
         if not broadcast_id:
-            print("ブロードキャストIDが指定されていません")
+            logger.error("ブロードキャストIDが指定されていません")
             return None
         
         try:
@@ -481,7 +671,7 @@ class YouTubeLiveController:
                 id=broadcast_id
             )
             
-            response = request.execute()
+            response = request.execute(num_retries=self.NUM_RETRIES)
             if not response.get("items"):
                 return None
             
@@ -494,6 +684,6 @@ class YouTubeLiveController:
             }
             
             return broadcast_info
-        except Exception as e:
-            print(f"ブロードキャスト情報の取得エラー: {str(e)}")
+        except API_ERRORS as e:
+            logger.error("ブロードキャスト情報の取得エラー: %s", e)
             return None 
\ No newline at end of file
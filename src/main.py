@@ -5,17 +5,66 @@ import os
 import time
 import sys
 import argparse
+import signal
+import threading
+import traceback
+from concurrent.futures import Future
 
 from src.config.settings import ConfigManager
+from src.config.logging_config import setup_logging
 from src.domain.entities.stream_settings import StreamConfigModel
 from src.infrastructure.obs.obs_client import OBSClient
 from src.infrastructure.obs.scene_manager import SceneManager
 from src.infrastructure.obs.stream_controller import OBSStreamController
-from src.infrastructure.youtube.youtube_adapter import YouTubeLiveAdapter
 from src.application.services.stream_service import StreamService
 
+def _create_youtube_controller(client_secrets, auto_proceed):
+    """
+    YouTubeコントローラーを作成する（認証を含む）
+    
+    Args:
+        client_secrets (str): OAuthクライアントシークレットのJSONファイルパス
+        auto_proceed (bool): ライブへの移行に失敗した場合も確認せずに待機を続けるかどうか
+        
+    Returns:
+        YouTubeLiveAdapter: YouTubeコントローラー
+    """
+    # Google APIクライアントの読み込みは重いため、YouTubeを使う場合のみインポートする
+    from src.infrastructure.youtube.youtube_adapter import YouTubeLiveAdapter
+    return YouTubeLiveAdapter(client_secrets, auto_proceed=auto_proceed)
+
+def _run_in_daemon_thread(func, *args):
+    """
+    関数をデーモンスレッドで実行し、結果を受け取るFutureを返す
+    
+    ThreadPoolExecutorのワーカーは終了時に待ち合わせられるため、
+    結果を待たずに終了する可能性がある処理はデーモンスレッドで実行する
+    
+    Args:
+        func (callable): 実行する関数
+        args: 関数に渡す引数
+        
+    Returns:
+        Future: 関数の戻り値または例外を受け取るFuture
+    """
+    future = Future()
+    
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(func(*args))
+        except BaseException as e:
+            future.set_exception(e)
+    
+    threading.Thread(target=run, daemon=True).start()
+    return future
+
 def main():
     """メイン処理"""
+    stream_service = None
+    stream_controller = None
+    obs_client = None
     try:
         # コマンドライン引数の解析
         parser = argparse.ArgumentParser(description='OBSとYouTubeを統合した自動配信システム')
@@ -23,6 +72,9 @@ def main():
         parser.add_argument('--skip-youtube', action='store_true', help='YouTubeライブ配信をスキップしてOBSのみを使用')
         args = parser.parse_args()
         
+        # ログ出力を設定
+        setup_logging()
+        
         # 設定を読み込む
         config_manager = ConfigManager(args.config)
         
@@ -47,6 +99,7 @@ def main():
         
         # OBSが起動しているか確認
         print("OBS接続テスト中...")
+        pre_client = None
         try:
             # OBS接続の作成
             obs_client = OBSClient(
@@ -62,8 +115,8 @@ def main():
             print(f"OBS Studio バージョン: {version.obs_version}")
             print(f"OBS WebSocket バージョン: {version.obs_web_socket_version}")
             
-            # テスト接続はいったん切断
-            obs_client.disconnect()
+            # テスト接続に成功したクライアントを本番用に使い回す
+            pre_client = test_client
         except Exception as e:
             print(f"OBS接続エラー: {str(e)}")
             print("OBS Studioが起動しているか、WebSocketの設定が正しいか確認してください。")
@@ -72,21 +125,31 @@ def main():
             if retry.lower() != 'y':
                 return
         
+        # YouTubeの認証はOBSの接続テスト（入力待ちを含む）の後に開始し、
+        # OBSコンポーネントの初期化と並行して行う。途中で終了しても待たされないようデーモンスレッドで実行する
+        youtube_future = None
+        if not args.skip_youtube and client_secrets:
+            youtube_future = _run_in_daemon_thread(
+                _create_youtube_controller,
+                client_secrets,
+                config_model.stream.auto_proceed_on_invalid_transition
+            )
+        
         # 各コンポーネントの初期化
         # インフラストラクチャレイヤー
         obs_client = OBSClient(
             host=config_model.obs.host,
             port=config_model.obs.port,
-            password=config_model.obs.password
+            password=config_model.obs.password,
+            existing_client=pre_client
         )
-        client = obs_client.connect()
-        scene_manager = SceneManager(client)
-        stream_controller = OBSStreamController(client, scene_manager, config_file=args.config)
+        obs_client.connect()
+        # 再接続時に全コンポーネントが新しいクライアントを使えるよう、接続を共有する
+        scene_manager = SceneManager(obs_client)
+        stream_controller = OBSStreamController(obs_client, scene_manager, config_file=args.config)
         
-        # YouTubeコントローラーの初期化（必要な場合）
-        youtube_controller = None
-        if not args.skip_youtube and client_secrets:
-            youtube_controller = YouTubeLiveAdapter(client_secrets)
+        # YouTubeコントローラーの初期化完了を待つ（必要な場合）
+        youtube_controller = youtube_future.result() if youtube_future else None
         
         # アプリケーションサービスの初期化
         stream_service = StreamService(
@@ -118,31 +181,31 @@ def main():
         
         print("配信を開始しました。終了するにはCtrl+Cを押してください。")
         
-        # ユーザーが止めるまで実行
-        try:
-            input("終了するにはEnterキーを押してください...")
-        except KeyboardInterrupt:
-            print("ユーザーによって配信が中断されました")
-        
-        # 配信終了
-        stream_service.stop_integrated_stream()
-        print("配信が終了しました")
+        # SIGINT/SIGTERMを受けるまで実行（端末がなくても停止できるよう入力待ちは使わない）
+        stop_requested = threading.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda signum, frame: stop_requested.set())
+        # タイムアウト付きで待つことで、どのプラットフォームでもシグナルを受け付けられるようにする
+        while not stop_requested.wait(1.0):
+            pass
+        print("ユーザーによって配信が中断されました")
         
     except KeyboardInterrupt:
         print("ユーザーによって処理が中断されました")
-        try:
-            stream_service.stop_integrated_stream()
-        except:
-            pass
     except Exception as e:
         print(f"エラーが発生しました: {e}")
-        try:
-            stream_service.stop_integrated_stream()
-        except:
-            pass
-        import traceback
         traceback.print_exc()
         sys.exit(1)
+    finally:
+        # 正常終了・中断・エラーのいずれの場合も配信を終了する
+        # stop_integrated_stream は内部でエラーを処理して結果をboolで返す
+        if stream_service is not None:
+            stream_service.stop_integrated_stream()
+            print("配信が終了しました")
+        if stream_controller is not None:
+            stream_controller.close()
+        if obs_client is not None:
+            obs_client.disconnect()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file